@@ -0,0 +1,139 @@
+import pandas as pd
+
+from audit import GOAL_EVENTS
+
+# Spalten der Team-Bilanz je (team, ist_heim)
+TEAM_TALLY_COLUMNS = ['tore_geschossen', 'tore_geschossen_n', 'tore_kassiert', 'tore_kassiert_n',
+                      'sieg', 'unentschieden', 'niederlage', 'zeilen']
+
+
+def _plain_keys(df, keys):
+    """Kategorie-Schlüssel als normale Werte, damit sich Teilergebnisse verschiedener Batches zusammenführen lassen"""
+    converted = {col: df[col].astype(object) for col in keys if isinstance(df[col].dtype, pd.CategoricalDtype)}
+    return df.assign(**converted) if converted else df
+
+
+def _combine(total, part):
+    """Addiert ein Teilergebnis zu einem laufenden Aggregat (gleicher Index)"""
+    if total is None:
+        return part
+    levels = list(range(part.index.nlevels))
+    return pd.concat([total, part]).groupby(level=levels, dropna=False).sum()
+
+
+class RunningAggregates:
+    """Materialisierte Aggregate, die sich mit jedem neuen Spiel fortschreiben lassen.
+
+    Gehalten werden nur Summen und Zähler (keine Mittelwerte oder Quoten),
+    damit add() ein neues Teilergebnis einfach dazuaddieren kann:
+    Tore je Spieler, Team-Bilanz je Team und Heim/Auswärts, Tore je
+    5-Minuten-Intervall, Zeitstrafen und 7-Meter je Spieler. Der Aufwand
+    von add() hängt nur von den neuen Zeilen und der Anzahl Gruppen ab.
+    """
+
+    def __init__(self):
+        self.player_goals = None     # (name, team) -> tore
+        self.team_tallies = None     # (team, ist_heim) -> TEAM_TALLY_COLUMNS
+        # Bei den Ereignis-Aggregaten ist team der Teamname (Spalte mannschaft)
+        self.interval_goals = None   # (intervall, team) -> Anzahl Tore
+        self.penalties = None        # (spieler, team) -> Anzahl 2-Minuten
+        self.seven_meters = None     # (spieler, team) -> verwandelt, fehlwuerfe
+
+    @classmethod
+    def from_frames(cls, df_team_games, df_players, df_events):
+        """Kompletter Neuaufbau aus den vollständigen Tabellen"""
+        aggregates = cls()
+        aggregates.add(df_team_games, df_players, df_events)
+        return aggregates
+
+    def add(self, df_team_games, df_players, df_events):
+        """Schreibt die Aggregate mit neuen Zeilen (Team-Spiele, Spieler, Ereignisse) fort"""
+        players = _plain_keys(df_players, ['name', 'team'])
+        self.player_goals = _combine(self.player_goals, players.groupby(['name', 'team'])['tore'].sum())
+
+        team_games = df_team_games.assign(
+            tore_geschossen_n=df_team_games['tore_geschossen'].notna().astype(int),
+            tore_kassiert_n=df_team_games['tore_kassiert'].notna().astype(int),
+            zeilen=1,
+        )
+        tallies = team_games.groupby(['team', 'ist_heim'], dropna=False)[TEAM_TALLY_COLUMNS].sum()
+        self.team_tallies = _combine(self.team_tallies, tallies)
+
+        # Ereignisse nach Teamname (mannschaft) statt 'Heim'/'Gast' zusammenfassen
+        events = _plain_keys(df_events, ['spieler', 'mannschaft']).drop(columns='team').rename(
+            columns={'mannschaft': 'team'})
+        goals = events[events['ereignis'].isin(GOAL_EVENTS)]
+        self.interval_goals = _combine(self.interval_goals, goals.groupby(['intervall', 'team']).size())
+
+        strafen = events[events['ereignis'] == '2-Minuten']
+        self.penalties = _combine(self.penalties, strafen.groupby(['spieler', 'team']).size())
+
+        siebenmeter = events[events['ereignis'].isin(['7m-Tor', '7m-Fehlwurf'])]
+        counts = pd.DataFrame({
+            'verwandelt': (siebenmeter['ereignis'] == '7m-Tor').astype(int),
+            'fehlwuerfe': (siebenmeter['ereignis'] == '7m-Fehlwurf').astype(int),
+            'spieler': siebenmeter['spieler'],
+            'team': siebenmeter['team'],
+        })
+        self.seven_meters = _combine(self.seven_meters, counts.groupby(['spieler', 'team']).sum())
+
+    def equals(self, other):
+        """True, wenn beide Aggregate identisch sind (z.B. fortgeschrieben vs. neu berechnet)"""
+        return all(
+            getattr(self, name).sort_index().equals(getattr(other, name).sort_index())
+            for name in ('player_goals', 'team_tallies', 'interval_goals', 'penalties', 'seven_meters')
+        )
+
+    def top_scorer(self, top_n=10):
+        return (self.player_goals
+                .reset_index()
+                # Gleichstand nach Name/Team, wie ORDER BY im SQLite-Pfad
+                .sort_values(['tore', 'name', 'team'], ascending=[False, True, True], kind='stable')
+                .head(top_n))
+
+    def team_statistics(self):
+        tallies = self.team_tallies[self.team_tallies.index.get_level_values('team').notna()]
+        t = tallies.groupby(level='team').sum()
+        team_summary = pd.DataFrame({
+            'tore_geschossen': t['tore_geschossen'],
+            'tore_pro_spiel': t['tore_geschossen'] / t['tore_geschossen_n'],
+            'tore_kassiert': t['tore_kassiert'],
+            'gegentore_pro_spiel': t['tore_kassiert'] / t['tore_kassiert_n'],
+            'siege': t['sieg'],
+            'unentschieden': t['unentschieden'],
+            'niederlagen': t['niederlage'],
+        }).round(2)
+
+        team_summary['spiele'] = team_summary['siege'] + team_summary['unentschieden'] + team_summary['niederlagen']
+        team_summary['siegquote'] = (team_summary['siege'] / team_summary['spiele'] * 100).round(1)
+        team_summary['tordifferenz'] = team_summary['tore_geschossen'] - team_summary['tore_kassiert']
+
+        team_summary = team_summary.reset_index()
+        return team_summary.sort_values(['siegquote', 'tordifferenz'], ascending=[False, False])
+
+    def home_away(self):
+        """Siege und Anzahl Team-Spiele je ist_heim (True/False)"""
+        return self.team_tallies.groupby(level='ist_heim')[['sieg', 'zeilen']].sum()
+
+    def goals_by_interval(self):
+        if len(self.interval_goals) == 0:
+            return pd.DataFrame()
+        return self.interval_goals.reset_index(name='anzahl_tore')
+
+    def penalty_statistics(self, top_n=10):
+        if len(self.penalties) == 0:
+            return pd.DataFrame()
+        return (self.penalties
+                .reset_index(name='anzahl_strafen')
+                .sort_values(['anzahl_strafen', 'spieler', 'team'], ascending=[False, True, True], kind='stable')
+                .head(top_n))
+
+    def seven_meter_efficiency(self):
+        stats = self.seven_meters.reset_index()
+        stats['gesamt'] = stats['verwandelt'] + stats['fehlwuerfe']
+        stats = stats[stats['gesamt'] > 0].reset_index(drop=True)
+        if len(stats) == 0:
+            return pd.DataFrame()
+        # round() pro Zeile wie bisher (Python-Rundung statt numpy)
+        stats['quote'] = [round(v / g * 100, 1) for v, g in zip(stats['verwandelt'], stats['gesamt'])]
+        return stats.sort_values('gesamt', ascending=False)
@@ -1,41 +1,166 @@
 import pandas as pd
 import numpy as np
 import os
+import itertools
+import tempfile
 from datetime import datetime
 
+import storage
+from aggregates import RunningAggregates
+from audit import GOAL_EVENTS
+from memo import memoized
+
+
+# Zähler für invalidate_cache: jede Invalidierung ergibt eine neue, nirgends geteilte Datenversion
+_INVALIDATIONS = itertools.count(1)
+
+# Spalten, die _add_event_columns an die Ereignisse anhängt (nicht Teil der gespeicherten Tabelle)
+EVENT_COLUMNS = ['sekunden', 'minute', 'halbzeit', 'intervall', 'ist_tor', 'mannschaft']
+
+
+def _same_result(left, right):
+    """Vergleicht zwei get_*-Ergebnisse nach Werten (Index und Kategorie-/Ganzzahl-Typen egal)"""
+    if not isinstance(left, pd.DataFrame) or not isinstance(right, pd.DataFrame):
+        return left == right
+    def plain(df):
+        df = df.reset_index(drop=True)
+        return df.astype({col: object for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)})
+    try:
+        pd.testing.assert_frame_equal(plain(left), plain(right), check_dtype=False)
+    except AssertionError:
+        return False
+    return True
+
+
+def _key(value):
+    """Spielnummer als Dict-Schlüssel (numpy-Skalare -> Python, 107009 == 107009.0 == '107009')"""
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    return value.item() if hasattr(value, 'item') else value
+
+
+class GameIndex:
+    """Spiel-Index: Ereignisse je Spiel als zusammenhängende Abschnitte.
+
+    Die Ereignisse werden einmal (stabil) nach Spielnummer und Spielzeit
+    sortiert; je Spiel merkt sich der Index Anfang und Ende seines
+    Abschnitts. Eine Abfrage kostet so nur die Zeilen dieses Spiels statt
+    eines Scans über die ganze Liga. df_events selbst bleibt unverändert.
+    """
+    
+    def __init__(self, df_games, df_events):
+        self.df_games = df_games
+        self.df_events = df_events
+        
+        spielnummer = df_events['spielnummer'].to_numpy(dtype=float, na_value=np.nan)
+        self._order = np.lexsort((df_events['sekunden'].to_numpy(dtype=float), spielnummer))
+        sortiert = spielnummer[self._order]
+        # NaN landet bei lexsort am Ende und bekommt keinen Abschnitt
+        gueltig = int((~np.isnan(sortiert)).sum())
+        nummern, starts, counts = np.unique(sortiert[:gueltig], return_index=True, return_counts=True)
+        self._offsets = {_key(n): (int(start), int(start + count))
+                         for n, start, count in zip(nummern, starts, counts)}
+        
+        # Erste Zeile je Spielnummer (wie df_games[df_games['spielnummer'] == n].iloc[0])
+        erste = ~df_games['spielnummer'].duplicated() & df_games['spielnummer'].notna()
+        self._games = {_key(n): pos for pos, n in zip(np.flatnonzero(erste), df_games['spielnummer'][erste])}
+    
+    def extend(self, df_games, df_events):
+        """Übernimmt angehängte Spiele und Ereignisse (alte Zeilen unverändert am Anfang der Tabellen).
+
+        Sortiert werden nur die neuen Ereignisse, ihre Abschnitte kommen
+        hinter die bisherigen. Gibt es eine Spielnummer schon, wird der Index
+        neu aufgebaut, damit ihre Ereignisse ein Abschnitt bleiben.
+        """
+        neu = GameIndex(df_games.iloc[len(self.df_games):], df_events.iloc[len(self.df_events):])
+        if any(n in self._games or n in self._offsets for n in list(neu._games) + list(neu._offsets)):
+            return GameIndex(df_games, df_events)
+        
+        verschiebung = len(self._order)
+        self._order = np.concatenate([self._order, neu._order + len(self.df_events)])
+        self._offsets.update({n: (start + verschiebung, end + verschiebung) for n, (start, end) in neu._offsets.items()})
+        self._games.update({n: pos + len(self.df_games) for n, pos in neu._games.items()})
+        self.df_games = df_games
+        self.df_events = df_events
+        return self
+    
+    def events(self, spielnummer):
+        """Alle Ereignisse eines Spiels, chronologisch sortiert (leer, wenn unbekannt)"""
+        start, end = self._offsets.get(_key(spielnummer), (0, 0))
+        return self.df_events.iloc[self._order[start:end]]
+    
+    def game(self, spielnummer):
+        """Spielinfo (Zeile aus df_games) zu einer Spielnummer; KeyError, wenn unbekannt"""
+        return self.df_games.iloc[self._games[_key(spielnummer)]]
+    
+    def spielnummern(self):
+        """Alle Spielnummern in der Reihenfolge von df_games"""
+        return list(self._games)
+    
+    def __contains__(self, spielnummer):
+        return _key(spielnummer) in self._games
+
 class HandballAnalyzer:
-    def __init__(self, data_dir="../data/processed"):
-        """Initialisiert den Analyzer mit dem Datenverzeichnis"""
+    def __init__(self, data_dir="../data/processed", liga=None, saison=None, spieltag_von=None, spieltag_bis=None,
+                 spielnummer=None, team=None):
+        """Initialisiert den Analyzer mit dem Datenverzeichnis.
+
+        Mit liga/saison/spieltag_von/spieltag_bis werden aus dem partitionierten
+        Dataset nur die passenden Partitionen gelesen.
+        Mit spielnummer/team werden nur diese Spiele (bzw. die Spiele dieser
+        Teams) geladen; liegt die SQLite-Datenbank vor, filtert sie über ihre
+        Indizes, ohne die ganze Liga zu lesen.
+        """
         self.data_dir = data_dir
+        self.partition_filter = {'liga': liga, 'saison': saison,
+                                 'spieltag_von': spieltag_von, 'spieltag_bis': spieltag_bis}
+        self.game_filter = {'spielnummer': spielnummer, 'team': team}
+        self.use_sqlite = False
         self.df_games = None
         self.df_players = None
         self.df_events = None
+        self.df_team_games = None
+        self.game_index = None
+        self.aggregates = None
+        self.data_version = None
         self.load_data()
     
     def load_data(self):
-        """Lädt alle CSV-Dateien aus dem Datenverzeichnis"""
+        """Lädt die Tabellen aus dem Datenverzeichnis.
+
+        Reihenfolge: SQLite (bei Spiel-/Teamfilter), Dataset (bei
+        Partitionsfilter oder wenn es neuer ist als die flachen Tabellen),
+        Arrow-IPC, Parquet, sonst CSV.
+        """
+        # Neue Version aus den Dateien: Einträge des alten Datenstands trifft diese Instanz nicht mehr
         try:
-            games_file = os.path.join(self.data_dir, "spiele.csv")
-            players_file = os.path.join(self.data_dir, "spieler_statistiken.csv")
-            events_file = os.path.join(self.data_dir, "spielereignisse.csv")
-            
-            self.df_games = pd.read_csv(games_file, skipinitialspace=True)
-            self.df_players = pd.read_csv(players_file, skipinitialspace=True)
-            self.df_events = pd.read_csv(events_file, skipinitialspace=True)
-            
-            # Spalten bereinigen
-            self.df_games.columns = self.df_games.columns.str.strip()
-            self.df_players.columns = self.df_players.columns.str.strip()
-            self.df_events.columns = self.df_events.columns.str.strip()
-            
-            # Datum konvertieren
-            if 'datum' in self.df_games.columns:
-                self.df_games['datum'] = pd.to_datetime(
-                    self.df_games['datum'], 
-                    format='%d.%m.%Y', 
-                    errors='coerce'
-                )
+            self.data_version = storage.data_version(
+                self.data_dir, sorted(self.partition_filter.items()), sorted(self.game_filter.items()))
+            filtered = any(value is not None for value in self.partition_filter.values())
+            game_filtered = any(value is not None for value in self.game_filter.values())
+            self.use_sqlite = False
+            if game_filtered and not filtered and storage.has_sqlite(self.data_dir):
+                self._load_sqlite()
+            else:
+                flat = (storage.ARROW_EXTENSION if storage.has_arrow(self.data_dir)
+                        else 'parquet' if storage.has_parquet(self.data_dir) else None)
+                # Mit --dataset angehängte Spiele fehlen in älteren flachen Tabellen
+                if filtered or (storage.has_dataset(self.data_dir)
+                                and (flat is None or storage.dataset_is_newer(self.data_dir, flat))):
+                    self._load_dataset()
+                elif storage.has_arrow(self.data_dir):
+                    self._load_arrow()
+                elif storage.has_parquet(self.data_dir):
+                    self._load_parquet()
+                else:
+                    self._load_csv()
+                if game_filtered:
+                    self._apply_game_filter()
             
+            self.df_events = self._add_event_columns(self.df_events, self.df_games)
+            self.df_team_games = self._build_team_games(self.df_games)
+            self.game_index = GameIndex(self.df_games, self.df_events)
+            self.aggregates = RunningAggregates.from_frames(self.df_team_games, self.df_players, self.df_events)
             print(f"✅ Daten geladen: {len(self.df_games)} Spiele, {len(self.df_players)} Spieler-Einträge, {len(self.df_events)} Events")
         except FileNotFoundError as e:
             print(f"❌ Fehler: Dateien nicht gefunden in {self.data_dir}")
@@ -48,110 +173,266 @@ class HandballAnalyzer:
             print(f"❌ Fehler beim Laden der Daten: {e}")
             raise
     
+    def _load_parquet(self):
+        """Lädt die typisierten Parquet-Dateien (Datum und Kategorien bereits konvertiert)"""
+        tables = storage.load_parquet(self.data_dir)
+        self.df_games = tables['games']
+        self.df_players = tables['players']
+        self.df_events = tables['events']
+    
+    def _load_arrow(self):
+        """Mappt die Arrow-IPC-Dateien in den Speicher (ohne Kopie, von allen Prozessen geteilt)"""
+        tables = storage.load_arrow(self.data_dir)
+        self.df_games = tables['games']
+        self.df_players = tables['players']
+        self.df_events = tables['events']
+    
+    def _load_dataset(self):
+        """Lädt das partitionierte Dataset, gefiltert auf die gewünschten Partitionen"""
+        if not storage.has_dataset(self.data_dir):
+            raise FileNotFoundError(storage.dataset_dir(self.data_dir))
+        tables = storage.load_partitions(self.data_dir, **self.partition_filter)
+        self.df_games = tables['games']
+        self.df_players = tables['players']
+        self.df_events = tables['events']
+    
+    def _load_sqlite(self):
+        """Lädt nur die gefilterten Spiele aus der SQLite-Datenbank (Filter laufen in der Datenbank)"""
+        tables = storage.load_sqlite(self.data_dir, **self.game_filter)
+        self.df_games = tables['games']
+        self.df_players = tables['players']
+        self.df_events = tables['events']
+        self.use_sqlite = True
+    
+    def _apply_game_filter(self):
+        """Wie _load_sqlite, aber in pandas (ohne Datenbank)"""
+        mask = pd.Series(True, index=self.df_games.index)
+        spielnummer, team = self.game_filter['spielnummer'], self.game_filter['team']
+        if spielnummer is not None:
+            values = [spielnummer] if pd.api.types.is_scalar(spielnummer) else list(spielnummer)
+            mask &= self.df_games['spielnummer'].isin(values)
+        if team is not None:
+            values = [team] if pd.api.types.is_scalar(team) else list(team)
+            mask &= (self.df_games['heimmannschaft'].isin(values) | self.df_games['gastmannschaft'].isin(values))
+        self.df_games = self.df_games[mask].reset_index(drop=True)
+        pdf_files = set(self.df_games['pdf_file'])
+        self.df_players = self.df_players[self.df_players['pdf_file'].isin(pdf_files)].reset_index(drop=True)
+        self.df_events = self.df_events[self.df_events['pdf_file'].isin(pdf_files)].reset_index(drop=True)
+    
+    def _add_event_columns(self, events, games):
+        """Berechnet einmalig abgeleitete Ereignis-Spalten (vektorisiert), die alle Analysen nutzen.
+
+        sekunden/minute: Spielzeit (minute in Dezimalminuten), halbzeit: 1 bis
+        einschließlich 30:00, sonst 2, intervall: 5-Minuten-Intervall,
+        ist_tor: Tor oder 7m-Tor, mannschaft: Teamname statt 'Heim'/'Gast'
+        (über pdf_file aus games).
+        """
+        parts = events['zeit'].astype(str).str.split(':', n=1, expand=True).reindex(columns=[0, 1])
+        minuten = pd.to_numeric(parts[0], errors='coerce')
+        sekunden = pd.to_numeric(parts[1], errors='coerce')
+        # Fehlende oder unlesbare Zeiten zählen als 0
+        valid = minuten.notna() & sekunden.notna()
+        events['sekunden'] = (minuten * 60 + sekunden).where(valid, 0)
+        events['minute'] = (minuten + sekunden / 60).where(valid, 0)
+        events['halbzeit'] = np.where(events['minute'] <= 30, 1, 2)
+        events['intervall'] = (events['minute'] // 5) * 5
+        events['ist_tor'] = events['ereignis'].isin(GOAL_EVENTS)
+        
+        games = games.drop_duplicates('pdf_file').set_index('pdf_file')
+        heim = events['pdf_file'].map(games['heimmannschaft'].astype(object))
+        gast = events['pdf_file'].map(games['gastmannschaft'].astype(object))
+        team = events['team'].astype(object)
+        events['mannschaft'] = heim.where(team == 'Heim', gast.where(team == 'Gast'))
+        return events
+    
+    def _build_team_games(self, games):
+        """Baut die Team-Spiel-Tabelle: eine Zeile pro Team und Spiel (Heim und Gast).
+
+        Spalten: spielnummer, datum, team, gegner, ist_heim, tore_geschossen,
+        tore_kassiert, ergebnis ('S'/'U'/'N') und sieg/unentschieden/niederlage
+        als 0/1. Grundlage aller Team-Metriken.
+        """
+        columns = {}
+        for ist_heim, team, gegner, geschossen, kassiert in (
+                (True, 'heimmannschaft', 'gastmannschaft', 'endstand_heim', 'endstand_gast'),
+                (False, 'gastmannschaft', 'heimmannschaft', 'endstand_gast', 'endstand_heim')):
+            columns[ist_heim] = pd.DataFrame({
+                'spielnummer': games['spielnummer'],
+                'datum': games['datum'],
+                'team': games[team].astype(object),
+                'gegner': games[gegner].astype(object),
+                'ist_heim': ist_heim,
+                'tore_geschossen': games[geschossen],
+                'tore_kassiert': games[kassiert],
+            })
+        team_games = pd.concat([columns[True], columns[False]], ignore_index=True)
+        
+        # Ohne Endstand (NaN) zählt ein Spiel weder als Sieg noch als Unentschieden oder Niederlage
+        team_games['sieg'] = (team_games['tore_geschossen'] > team_games['tore_kassiert']).astype(int)
+        team_games['unentschieden'] = (team_games['tore_geschossen'] == team_games['tore_kassiert']).astype(int)
+        team_games['niederlage'] = (team_games['tore_geschossen'] < team_games['tore_kassiert']).astype(int)
+        team_games['ergebnis'] = np.sign(team_games['tore_geschossen'] - team_games['tore_kassiert']).map(
+            {1: 'S', 0: 'U', -1: 'N'})
+        return team_games
+    
+    def ingest(self, games, players, events):
+        """Fügt neue Spiele hinzu, ohne alles neu zu laden oder neu zu berechnen.
+
+        games/players/events sind DataFrames (oder Listen von Dicts) im Format
+        von pdf_parser. Spiele, deren PDF schon geladen ist, werden ignoriert.
+        Doppelte Spieler (storage.PLAYER_KEY) werden wie in
+        pdf_parser.build_dataframes verworfen, der erste Eintrag gewinnt.
+        Die materialisierten Aggregate (siehe aggregates.RunningAggregates)
+        und der GameIndex werden nur um die neuen Zeilen fortgeschrieben;
+        verify_aggregates() vergleicht die Aggregate mit einer kompletten
+        Neuberechnung, verify_reload() alle Analysen mit einem frisch
+        geladenen Analyzer. Das Anhängen an die Tabellen selbst kopiert sie
+        (pd.concat), kostet also weiterhin Zeit proportional zum Datenstand.
+        Gibt die Anzahl neuer Spiele zurück.
+        """
+        games = self._prepare_new(games, 'games')
+        games = games[~games['pdf_file'].isin(self.df_games['pdf_file'])]
+        if len(games) == 0:
+            return 0
+        new_pdfs = set(games['pdf_file'])
+        players = self._prepare_new(players, 'players')
+        players = self._drop_known_players(players[players['pdf_file'].isin(new_pdfs)])
+        events = self._prepare_new(events, 'events')
+        events = self._add_event_columns(events[events['pdf_file'].isin(new_pdfs)].copy(), games)
+        team_games = self._build_team_games(games)
+        
+        self.df_games = pd.concat([self.df_games, games], ignore_index=True)
+        self.df_players = pd.concat([self.df_players, players], ignore_index=True)
+        self.df_events = pd.concat([self.df_events, events], ignore_index=True)
+        self.df_team_games = pd.concat([self.df_team_games, team_games], ignore_index=True)
+        self.game_index = self.game_index.extend(self.df_games, self.df_events)
+        self.aggregates.add(team_games, players, events)
+        
+        # Neuer Datenstand (eigene Version, alte Cache-Einträge gelten nicht), SQLite kennt die neuen Spiele nicht
+        self.data_version = storage.data_version(self.data_dir, self.data_version, sorted(new_pdfs))
+        self.use_sqlite = False
+        print(f"➕ {len(games)} neue Spiele übernommen ({len(self.df_games)} insgesamt)")
+        return len(games)
+    
+    def _drop_known_players(self, players):
+        """Verwirft doppelte Spieler innerhalb der neuen Zeilen und gegenüber den geladenen"""
+        players = players.drop_duplicates(subset=storage.PLAYER_KEY, keep='first')
+        known = self.df_players.loc[self.df_players['spielnummer'].isin(players['spielnummer']), storage.PLAYER_KEY]
+        if len(known) == 0:
+            return players
+        duplicate = pd.concat([known, players[storage.PLAYER_KEY]]).duplicated(keep='first').to_numpy()
+        return players[~duplicate[len(known):]]
+    
+    def _prepare_new(self, df, table):
+        """Typisiert neue Datensätze wie beim Laden (Spiel- und Trikotnummern aus dem Parser werden Zahlen)"""
+        return storage.from_typed(storage.to_typed(pd.DataFrame(df), table))
+    
+    def recompute_aggregates(self):
+        """Berechnet die Aggregate komplett neu aus den Tabellen und übernimmt sie"""
+        self.aggregates = RunningAggregates.from_frames(self.df_team_games, self.df_players, self.df_events)
+        self.invalidate_cache()
+        return self.aggregates
+    
+    def verify_aggregates(self):
+        """True, wenn die fortgeschriebenen Aggregate einer kompletten Neuberechnung entsprechen"""
+        full = RunningAggregates.from_frames(self.df_team_games, self.df_players, self.df_events)
+        return self.aggregates.equals(full)
+    
+    def verify_reload(self):
+        """True, wenn alle Analysen denen eines frisch geladenen Analyzers auf denselben Tabellen entsprechen.
+
+        Die Tabellen werden dafür als CSV in ein temporäres Verzeichnis
+        geschrieben und mit load_data neu geladen; verglichen werden alle
+        get_*-Ergebnisse, der Torverlauf für jedes Spiel.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            games = self.df_games.assign(datum=self.df_games['datum'].dt.strftime('%d.%m.%Y'))
+            for table, df in (('games', games), ('players', self.df_players),
+                              ('events', self.df_events.drop(columns=EVENT_COLUMNS))):
+                df.to_csv(storage.table_path(tmp, table, "csv"), index=False, encoding='utf-8-sig')
+            fresh = HandballAnalyzer(tmp)
+            
+            getters = ['get_top_scorer', 'get_team_statistics', 'get_home_advantage',
+                       'get_average_goals_per_game', 'get_goals_by_minute', 'get_penalty_statistics',
+                       'get_7m_efficiency', 'get_game_tempo', 'get_player_performance', 'get_disqualifications']
+            if not all(_same_result(getattr(self, name)(), getattr(fresh, name)()) for name in getters):
+                return False
+            return all(_same_result(self.get_goal_timeline(n), fresh.get_goal_timeline(n))
+                       for n in self.df_games['spielnummer'])
+    
+    def invalidate_cache(self):
+        """Verwirft die gecachten get_*-Ergebnisse dieser Instanz.
+
+        Die Instanz bekommt dafür eine neue, eindeutige Datenversion. Andere
+        Instanzen auf demselben Datenstand behalten ihre Einträge, die
+        verwaisten verdrängt der LRU-Cache.
+        """
+        if self.data_version is not None:
+            self.data_version = f"{self.data_version}+{next(_INVALIDATIONS)}"
+    
+    def query(self, sql, params=()):
+        """Führt eine SQL-Abfrage direkt auf der SQLite-Datenbank aus (Tabellen wie die CSV-Dateien)"""
+        if not storage.has_sqlite(self.data_dir):
+            raise FileNotFoundError(storage.sqlite_path(self.data_dir))
+        return storage.query_sqlite(self.data_dir, sql, params)
+    
+    def _sqlite_scope(self):
+        """WHERE-Bedingung, die eine Abfrage auf die geladenen Spiele beschränkt"""
+        games_filter, params = storage.sqlite_games_filter(**self.game_filter)
+        if not games_filter:
+            return "1", []
+        return f"pdf_file IN (SELECT pdf_file FROM {storage.TABLES['games']} WHERE {games_filter})", params
+    
+    def _load_csv(self):
+        """Lädt die CSV-Dateien und konvertiert das Datum"""
+        games_file = os.path.join(self.data_dir, "spiele.csv")
+        players_file = os.path.join(self.data_dir, "spieler_statistiken.csv")
+        events_file = os.path.join(self.data_dir, "spielereignisse.csv")
+        
+        self.df_games = pd.read_csv(games_file, skipinitialspace=True)
+        self.df_players = pd.read_csv(players_file, skipinitialspace=True)
+        self.df_events = pd.read_csv(events_file, skipinitialspace=True)
+        
+        # Spalten bereinigen
+        self.df_games.columns = self.df_games.columns.str.strip()
+        self.df_players.columns = self.df_players.columns.str.strip()
+        self.df_events.columns = self.df_events.columns.str.strip()
+        
+        # Datum konvertieren
+        if 'datum' in self.df_games.columns:
+            self.df_games['datum'] = pd.to_datetime(
+                self.df_games['datum'], 
+                format='%d.%m.%Y', 
+                errors='coerce'
+            )
+    
+    @memoized
     def get_top_scorer(self, top_n=10):
         """Gibt die Top-Torschützen zurück"""
-        top_scorer = (self.df_players
-                      .groupby(['name', 'team'], as_index=False)['tore']
-                      .sum()
-                      .sort_values('tore', ascending=False)
-                      .head(top_n))
-        
-        return top_scorer
+        if self.use_sqlite:
+            scope, params = self._sqlite_scope()
+            return self.query(
+                f"SELECT name, team, SUM(tore) AS tore FROM {storage.TABLES['players']} "
+                f"WHERE {scope} AND name IS NOT NULL AND team IS NOT NULL "
+                f"GROUP BY name, team ORDER BY tore DESC, name, team LIMIT ?", [*params, int(top_n)])
+        
+        return self.aggregates.top_scorer(top_n)
     
+    @memoized
     def get_team_statistics(self):
-        """Berechnet Team-Statistiken"""
-        stats = []
-        
-        for _, game in self.df_games.iterrows():
-            # Heimteam
-            stats.append({
-                'team': game['heimmannschaft'],
-                'tore_geschossen': game['endstand_heim'],
-                'tore_kassiert': game['endstand_gast'],
-                'sieg': 1 if game['endstand_heim'] > game['endstand_gast'] else 0,
-                'unentschieden': 1 if game['endstand_heim'] == game['endstand_gast'] else 0,
-                'niederlage': 1 if game['endstand_heim'] < game['endstand_gast'] else 0,
-                'ist_heim': True,
-                'datum': game['datum']
-            })
-            
-            # Gastteam
-            stats.append({
-                'team': game['gastmannschaft'],
-                'tore_geschossen': game['endstand_gast'],
-                'tore_kassiert': game['endstand_heim'],
-                'sieg': 1 if game['endstand_gast'] > game['endstand_heim'] else 0,
-                'unentschieden': 1 if game['endstand_gast'] == game['endstand_heim'] else 0,
-                'niederlage': 1 if game['endstand_gast'] < game['endstand_heim'] else 0,
-                'ist_heim': False,
-                'datum': game['datum']
-            })
-        
-        df_stats = pd.DataFrame(stats)
-        
-        # Aggregierte Statistiken pro Team
-        team_summary = df_stats.groupby('team').agg({
-            'tore_geschossen': ['sum', 'mean'],
-            'tore_kassiert': ['sum', 'mean'],
-            'sieg': 'sum',
-            'unentschieden': 'sum',
-            'niederlage': 'sum'
-        }).round(2)
-        
-        team_summary.columns = ['_'.join(col) if col[1] else col[0] 
-                                for col in team_summary.columns]
-        
-        # Spiele zählen und weitere Metriken
-        team_summary['spiele'] = (team_summary['sieg_sum'] + 
-                                   team_summary['unentschieden_sum'] + 
-                                   team_summary['niederlage_sum'])
-        team_summary['siegquote'] = (team_summary['sieg_sum'] / 
-                                     team_summary['spiele'] * 100).round(1)
-        team_summary['tordifferenz'] = (team_summary['tore_geschossen_sum'] - 
-                                        team_summary['tore_kassiert_sum'])
-        
-        team_summary = team_summary.reset_index()
-        
-        # Umbenennen
-        team_summary = team_summary.rename(columns={
-            'tore_geschossen_sum': 'tore_geschossen',
-            'tore_geschossen_mean': 'tore_pro_spiel',
-            'tore_kassiert_sum': 'tore_kassiert',
-            'tore_kassiert_mean': 'gegentore_pro_spiel',
-            'sieg_sum': 'siege',
-            'unentschieden_sum': 'unentschieden',
-            'niederlage_sum': 'niederlagen'
-        })
-        
-        # Sortieren nach Siegquote, dann Tordifferenz
-        return team_summary.sort_values(['siegquote', 'tordifferenz'], ascending=[False, False])
+        """Berechnet Team-Statistiken (aus der fortgeschriebenen Team-Bilanz)"""
+        # Sortiert nach Siegquote, dann Tordifferenz
+        return self.aggregates.team_statistics()
     
+    @memoized
     def get_home_advantage(self):
         """Berechnet Heimvorteil-Statistiken"""
-        stats = []
-        
-        for _, game in self.df_games.iterrows():
-            stats.append({
-                'ist_heim': True,
-                'sieg': 1 if game['endstand_heim'] > game['endstand_gast'] else 0,
-                'unentschieden': 1 if game['endstand_heim'] == game['endstand_gast'] else 0
-            })
-            stats.append({
-                'ist_heim': False,
-                'sieg': 1 if game['endstand_gast'] > game['endstand_heim'] else 0,
-                'unentschieden': 1 if game['endstand_gast'] == game['endstand_heim'] else 0
-            })
-        
-        df_stats = pd.DataFrame(stats)
-        home_stats = df_stats.groupby('ist_heim').agg({
-            'sieg': ['sum', 'count'],
-            'unentschieden': 'sum'
-        })
+        home_stats = self.aggregates.home_away()
         
-        heim_siege = int(home_stats.loc[True, ('sieg', 'sum')]) if True in home_stats.index else 0
-        auswaerts_siege = int(home_stats.loc[False, ('sieg', 'sum')]) if False in home_stats.index else 0
-        heim_spiele = int(home_stats.loc[True, ('sieg', 'count')]) if True in home_stats.index else 0
-        auswaerts_spiele = int(home_stats.loc[False, ('sieg', 'count')]) if False in home_stats.index else 0
+        heim_siege = int(home_stats.loc[True, 'sieg']) if True in home_stats.index else 0
+        auswaerts_siege = int(home_stats.loc[False, 'sieg']) if False in home_stats.index else 0
+        heim_spiele = int(home_stats.loc[True, 'zeilen']) if True in home_stats.index else 0
+        auswaerts_spiele = int(home_stats.loc[False, 'zeilen']) if False in home_stats.index else 0
         
         return {
             'heim_siegquote': round(heim_siege / heim_spiele * 100, 1) if heim_spiele > 0 else 0,
@@ -161,6 +442,7 @@ class HandballAnalyzer:
             'gesamt_spiele': len(self.df_games)
         }
     
+    @memoized
     def get_average_goals_per_game(self):
         """Berechnet durchschnittliche Tore pro Spiel"""
         if len(self.df_games) == 0:
@@ -173,123 +455,85 @@ class HandballAnalyzer:
             'gast': round(self.df_games['endstand_gast'].mean(), 2)
         }
     
+    @memoized
     def get_goal_timeline(self, spielnummer=None):
         """Erstellt Torverlauf über die Spielzeit für ein spezifisches Spiel"""
         if spielnummer is None and len(self.df_games) > 0:
             spielnummer = self.df_games['spielnummer'].iloc[0]
         
-        tor_events = self.df_events[
-            (self.df_events['spielnummer'] == spielnummer) & 
-            (self.df_events['ereignis'].isin(['Tor', '7m-Tor']))
-        ].copy()
+        game_events = self.game_index.events(spielnummer)
+        tor_events = game_events[game_events['ist_tor']]
         
         if len(tor_events) == 0:
             return pd.DataFrame()
         
-        tor_events['minute'] = tor_events['zeit'].apply(self._time_to_minutes)
         tor_events = tor_events.sort_values('minute')
         
-        return tor_events[['minute', 'team', 'stand_heim', 'stand_gast', 
-                          'spieler', 'ereignis']]
+        return (tor_events[['minute', 'mannschaft', 'stand_heim', 'stand_gast', 'spieler', 'ereignis']]
+                .rename(columns={'mannschaft': 'team'}))
     
+    @memoized
     def get_goals_by_minute(self):
-        """Analysiert Torverteilung nach Spielminuten"""
-        tor_events = self.df_events[
-            self.df_events['ereignis'].isin(['Tor', '7m-Tor'])
-        ].copy()
-        
-        if len(tor_events) == 0:
-            return pd.DataFrame()
-        
-        tor_events['minute'] = tor_events['zeit'].apply(self._time_to_minutes)
-        tor_events['intervall'] = (tor_events['minute'] // 5) * 5
-        
-        heatmap_data = tor_events.groupby(['intervall', 'team']).size().reset_index(name='anzahl_tore')
-        
-        return heatmap_data
+        """Analysiert Torverteilung nach Spielminuten (5-Minuten-Intervalle)"""
+        return self.aggregates.goals_by_interval()
     
+    @memoized
     def get_penalty_statistics(self):
         """Analysiert 2-Minuten-Strafen"""
-        strafen = self.df_events[self.df_events['ereignis'] == '2-Minuten'].copy()
-        
-        if len(strafen) == 0:
-            return pd.DataFrame()
-        
-        top_strafen = (strafen.groupby(['spieler', 'team'])
-                       .size()
-                       .reset_index(name='anzahl_strafen')
-                       .sort_values('anzahl_strafen', ascending=False)
-                       .head(10))
-        
-        return top_strafen
+        if self.use_sqlite:
+            scope, params = self._sqlite_scope()
+            top_strafen = self.query(
+                f"SELECT spieler, CASE team WHEN 'Heim' THEN heimmannschaft WHEN 'Gast' THEN gastmannschaft END "
+                f"AS mannschaft, COUNT(*) AS anzahl_strafen "
+                f"FROM {storage.TABLES['events']} JOIN {storage.TABLES['games']} USING (pdf_file) "
+                f"WHERE {scope} AND ereignis = '2-Minuten' AND spieler IS NOT NULL AND mannschaft IS NOT NULL "
+                f"GROUP BY spieler, mannschaft ORDER BY anzahl_strafen DESC, spieler, mannschaft LIMIT 10",
+                params).rename(columns={'mannschaft': 'team'})
+            return top_strafen if len(top_strafen) > 0 else pd.DataFrame()
+        
+        return self.aggregates.penalty_statistics(top_n=10)
     
+    @memoized
     def get_7m_efficiency(self):
         """Berechnet 7-Meter-Effizienz aus Event-Daten"""
-        siebenmeter = self.df_events[
-            self.df_events['ereignis'].str.contains('7m', na=False)
-        ].copy()
-        
-        if len(siebenmeter) == 0:
-            return pd.DataFrame()
-        
-        stats = []
-        for (spieler, team), gruppe in siebenmeter.groupby(['spieler', 'team']):
-            verwandelt = len(gruppe[gruppe['ereignis'] == '7m-Tor'])
-            fehlwuerfe = len(gruppe[gruppe['ereignis'] == '7m-Fehlwurf'])
-            gesamt = verwandelt + fehlwuerfe
-            
-            if gesamt > 0:
-                stats.append({
-                    'spieler': spieler,
-                    'team': team,
-                    'verwandelt': verwandelt,
-                    'fehlwuerfe': fehlwuerfe,
-                    'gesamt': gesamt,
-                    'quote': round(verwandelt / gesamt * 100, 1)
-                })
-        
-        df_stats = pd.DataFrame(stats)
-        return df_stats.sort_values('gesamt', ascending=False)
+        return self.aggregates.seven_meter_efficiency()
     
+    @memoized
     def get_game_tempo(self):
         """Analysiert Spieltempo (Tore pro Zeiteinheit)"""
-        tempo_data = []
+        tor_events = self.df_events[self.df_events['ist_tor']]
         
-        for spielnummer in self.df_events['spielnummer'].unique():
-            tor_events = self.df_events[
-                (self.df_events['spielnummer'] == spielnummer) & 
-                (self.df_events['ereignis'].isin(['Tor', '7m-Tor']))
-            ].copy()
-            
-            if len(tor_events) > 0:
-                tor_events['minute'] = tor_events['zeit'].apply(self._time_to_minutes)
-                
-                erste_halb = tor_events[tor_events['minute'] <= 30]
-                zweite_halb = tor_events[tor_events['minute'] > 30]
-                
-                tempo_data.append({
-                    'spielnummer': spielnummer,
-                    'tore_1_halbzeit': len(erste_halb),
-                    'tore_2_halbzeit': len(zweite_halb),
-                    'tempo_1_halbzeit': round(len(erste_halb) / 30, 2),
-                    'tempo_2_halbzeit': round(len(zweite_halb) / 30, 2)
-                })
-        
-        return pd.DataFrame(tempo_data)
+        if len(tor_events) == 0:
+            return pd.DataFrame()
+        
+        tore = (tor_events.groupby(['spielnummer', 'halbzeit']).size()
+                .unstack(fill_value=0)
+                .reindex(columns=[1, 2], fill_value=0))
+        # Spiele in der Reihenfolge ihres ersten Ereignisses
+        reihenfolge = pd.unique(self.df_events['spielnummer'])
+        tore = tore.reindex(reihenfolge[np.isin(reihenfolge, tore.index)])
+        
+        return pd.DataFrame({
+            'spielnummer': tore.index,
+            'tore_1_halbzeit': tore[1].to_numpy(),
+            'tore_2_halbzeit': tore[2].to_numpy(),
+            'tempo_1_halbzeit': (tore[1] / 30).round(2).to_numpy(),
+            'tempo_2_halbzeit': (tore[2] / 30).round(2).to_numpy()
+        })
     
+    @memoized
     def get_player_performance(self, min_goals=0):
         """Detaillierte Spieleranalyse mit Events-Daten"""
         # Tore aus Events
-        tore_events = self.df_events[
-            self.df_events['ereignis'].isin(['Tor', '7m-Tor'])
-        ].copy()
+        tore_events = self.df_events[self.df_events['ist_tor']]
         
-        tore_pro_spieler = (tore_events.groupby(['spieler', 'team'])
+        tore_pro_spieler = (tore_events.groupby(['spieler', 'mannschaft'], observed=True)
                            .size()
-                           .reset_index(name='tore_aus_events'))
+                           .reset_index(name='tore_aus_events')
+                           .rename(columns={'mannschaft': 'team'}))
         
         # Mit Spieler-Statistiken zusammenführen
-        player_stats = self.df_players.groupby(['name', 'team']).agg({
+        player_stats = self.df_players.groupby(['name', 'team'], observed=True).agg({
             'tore': 'sum',
             'siebenmeter_tore': 'sum',
             'siebenmeter_versuche': 'sum',
@@ -317,6 +561,7 @@ class HandballAnalyzer:
         
         return combined.sort_values('tore', ascending=False)
     
+    @memoized
     def get_disqualifications(self):
         """Analysiert Disqualifikationen"""
         disq_events = self.df_events[
@@ -326,17 +571,7 @@ class HandballAnalyzer:
         if len(disq_events) == 0:
             return pd.DataFrame()
         
-        return disq_events[['zeit', 'team', 'spieler', 'spielnummer']]
-    
-    def _time_to_minutes(self, time_str):
-        """Konvertiert Zeit (MM:SS) zu Dezimalminuten"""
-        try:
-            if pd.isna(time_str):
-                return 0
-            parts = str(time_str).split(':')
-            return int(parts[0]) + int(parts[1]) / 60
-        except:
-            return 0
+        return disq_events[['zeit', 'mannschaft', 'spieler', 'spielnummer']].rename(columns={'mannschaft': 'team'})
     
     def save_all_analyses(self, output_dir="../data/analysis"):
         """Speichert ALLE Analysen als CSV-Dateien"""
@@ -0,0 +1,182 @@
+import os
+import json
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+import storage
+
+PROCESSED_DIR = "../data/processed"
+
+# Ereignisse, die den Spielstand erhöhen
+GOAL_EVENTS = ['Tor', '7m-Tor']
+
+# Ende der ersten Halbzeit in Sekunden (ein Tor bei 30:00 zählt noch zur ersten)
+HALF_TIME = 30 * 60
+
+
+def load_tables(processed_dir=PROCESSED_DIR):
+    """Lädt die drei Tabellen (Arrow-IPC oder Parquet bevorzugt, sonst CSV)"""
+    if storage.has_arrow(processed_dir):
+        tables = storage.load_arrow(processed_dir)
+    elif storage.has_parquet(processed_dir):
+        tables = storage.load_parquet(processed_dir)
+    else:
+        tables = {table: pd.read_csv(storage.table_path(processed_dir, table, "csv"), skipinitialspace=True)
+                  for table in storage.TABLES}
+    return tables['games'], tables['players'], tables['events']
+
+
+def _clock_seconds(zeit):
+    """'MM:SS' -> Sekunden (vektorisiert)"""
+    parts = zeit.astype(str).str.split(":", n=1, expand=True)
+    return pd.to_numeric(parts[0], errors='coerce') * 60 + pd.to_numeric(parts[1], errors='coerce')
+
+
+def _scored_events(df_events):
+    """Ereignisse mit Spielstand, chronologisch je Spiel sortiert"""
+    scored = df_events.loc[df_events['stand_heim'].notna() & df_events['stand_gast'].notna(),
+                           ['pdf_file', 'spielnummer', 'zeit', 'ereignis', 'stand_heim', 'stand_gast']].copy()
+    scored['sekunden'] = _clock_seconds(scored['zeit'])
+    # Bei gleicher Zeit bleibt die Reihenfolge aus dem Spielbericht (stabile Sortierung),
+    # sonst würde ein Rückschritt innerhalb einer Sekunde (12:11, dann 11:11) verdeckt
+    return scored.sort_values(['pdf_file', 'sekunden'], kind='stable')
+
+
+def _score_at(games, goals, column_prefix):
+    """Vergleicht den letzten Spielstand aus goals mit games[<prefix>_heim/_gast]"""
+    # In derselben Sekunde ist die Reihenfolge nicht verlässlich (siehe check_monotonic): höchster Stand zählt
+    goals = goals.assign(summe=goals['stand_heim'] + goals['stand_gast']).sort_values(
+        ['pdf_file', 'sekunden', 'summe'], kind='stable')
+    last = goals.groupby('pdf_file', sort=False)[['stand_heim', 'stand_gast']].last()
+    merged = games[['pdf_file', 'spielnummer', f'{column_prefix}_heim', f'{column_prefix}_gast']].merge(
+        last, left_on='pdf_file', right_index=True, how='left')
+    # Ohne Tor steht es 0:0
+    merged[['stand_heim', 'stand_gast']] = merged[['stand_heim', 'stand_gast']].fillna(0)
+    mismatch = ((merged[f'{column_prefix}_heim'] != merged['stand_heim']) |
+                (merged[f'{column_prefix}_gast'] != merged['stand_gast']))
+    return merged[mismatch]
+
+
+def check_final_score(df_games, scored):
+    """Letztes Tor-Ereignis passt zum Endstand"""
+    goals = scored[scored['ereignis'].isin(GOAL_EVENTS)]
+    return _score_at(df_games, goals, 'endstand')
+
+
+def check_half_time(df_games, scored):
+    """Letztes Tor der ersten Halbzeit passt zum Halbzeitstand"""
+    goals = scored[scored['ereignis'].isin(GOAL_EVENTS) & (scored['sekunden'] <= HALF_TIME)]
+    return _score_at(df_games, goals, 'halbzeit')
+
+
+def check_player_goals(df_games, df_players, df_events):
+    """Tore je Spieler passen zu den Tor-Ereignissen (Tor + 7m-Tor) im Spielverlauf"""
+    goals = df_events[df_events['ereignis'].isin(GOAL_EVENTS)]
+    goals = goals.merge(df_games[['pdf_file', 'heimmannschaft', 'gastmannschaft']], on='pdf_file', how='left')
+    goals = goals.assign(
+        team=np.where(goals['team'].astype(str) == 'Heim', goals['heimmannschaft'], goals['gastmannschaft']),
+        trikotnummer=pd.to_numeric(goals['trikotnummer'], errors='coerce'),
+    )
+    from_events = goals.groupby(['pdf_file', 'team', 'trikotnummer'], observed=True).size().rename('tore_ereignisse')
+
+    players = df_players[['pdf_file', 'spielnummer', 'team', 'trikotnummer', 'name', 'tore']].copy()
+    players['team'] = players['team'].astype(str)
+    players['trikotnummer'] = pd.to_numeric(players['trikotnummer'], errors='coerce')
+    merged = players.merge(from_events.reset_index(), on=['pdf_file', 'team', 'trikotnummer'], how='outer')
+    merged['tore'] = merged['tore'].fillna(0)
+    merged['tore_ereignisse'] = merged['tore_ereignisse'].fillna(0)
+    return merged[merged['tore'] != merged['tore_ereignisse']]
+
+
+def check_monotonic(scored):
+    """Spielstände laufen in keinem Spiel rückwärts.
+
+    Verschiedene Ereignistypen in derselben Sekunde ordnet der Parser nach
+    EVENT_ORDER statt nach dem Spielbericht. Ein solches Paar gilt nur dann
+    als Rückschritt, wenn auch die umgekehrte Reihenfolge nicht aufgeht.
+    """
+    previous = scored.groupby('pdf_file', sort=False)[['stand_heim', 'stand_gast', 'sekunden', 'ereignis']].shift()
+    backwards = (scored['stand_heim'] < previous['stand_heim']) | (scored['stand_gast'] < previous['stand_gast'])
+    swapped = ((scored['sekunden'] == previous['sekunden']) & (scored['ereignis'] != previous['ereignis']) &
+               (scored['stand_heim'] <= previous['stand_heim']) & (scored['stand_gast'] <= previous['stand_gast']))
+    backwards &= ~swapped
+    result = scored[backwards].copy()
+    result['vorher_heim'] = previous.loc[backwards, 'stand_heim']
+    result['vorher_gast'] = previous.loc[backwards, 'stand_gast']
+    return result
+
+
+def _records(df, columns):
+    """DataFrame -> JSON-fähige Liste von Dicts (NaN wird None)"""
+    df = df[columns].astype(object).where(df[columns].notna(), None)
+
+    def plain(value):
+        value = value.item() if hasattr(value, 'item') else value
+        # Spielstände/Tore kommen durch Merges als Float, im Bericht als Ganzzahl
+        return int(value) if isinstance(value, float) and value.is_integer() else value
+    return [{k: plain(v) for k, v in row.items()} for row in df.to_dict('records')]
+
+
+def audit(df_games, df_players, df_events):
+    """Prüft alle Spiele auf Konsistenz und gibt einen JSON-fähigen Bericht zurück"""
+    start = time.perf_counter()
+    scored = _scored_events(df_events)
+
+    checks = {
+        'endstand': (check_final_score(df_games, scored),
+                     ['pdf_file', 'spielnummer', 'endstand_heim', 'endstand_gast', 'stand_heim', 'stand_gast']),
+        'halbzeit': (check_half_time(df_games, scored),
+                     ['pdf_file', 'spielnummer', 'halbzeit_heim', 'halbzeit_gast', 'stand_heim', 'stand_gast']),
+        'spieler_tore': (check_player_goals(df_games, df_players, df_events),
+                         ['pdf_file', 'spielnummer', 'team', 'trikotnummer', 'name', 'tore', 'tore_ereignisse']),
+        'spielstand_monoton': (check_monotonic(scored),
+                               ['pdf_file', 'spielnummer', 'zeit', 'ereignis', 'vorher_heim', 'vorher_gast',
+                                'stand_heim', 'stand_gast']),
+    }
+
+    report = {'spiele': len(df_games), 'pruefungen': {}}
+    faulty = set()
+    for name, (failures, columns) in checks.items():
+        faulty.update(failures['pdf_file'].dropna())
+        report['pruefungen'][name] = {
+            'fehler': len(failures),
+            'spiele': int(failures['pdf_file'].nunique()),
+            'details': _records(failures, columns),
+        }
+    report['fehlerhafte_spiele'] = len(faulty)
+    report['dauer_s'] = round(time.perf_counter() - start, 3)
+    return report
+
+
+def print_report(report):
+    """Kurze Zusammenfassung des Berichts"""
+    print(f"\n🔎 Konsistenz-Prüfung: {report['spiele']} Spiele in {report['dauer_s']:.2f} s")
+    for name, result in report['pruefungen'].items():
+        status = "✅" if result['fehler'] == 0 else "⚠️ "
+        print(f"   {status} {name}: {result['fehler']} Abweichungen in {result['spiele']} Spielen")
+    print(f"   {report['fehlerhafte_spiele']} Spiele mit mindestens einer Abweichung")
+
+
+def write_report(report, path):
+    """Speichert den Bericht als JSON"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"📄 Bericht: {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Konsistenz der verarbeiteten Spieldaten prüfen")
+    parser.add_argument("--processed-dir", default=PROCESSED_DIR, help="Ordner mit den Tabellen")
+    parser.add_argument("--report", default=os.path.join(PROCESSED_DIR, "audit.json"),
+                        help="Pfad für den JSON-Bericht")
+    args = parser.parse_args()
+
+    report = audit(*load_tables(args.processed_dir))
+    print_report(report)
+    write_report(report, args.report)
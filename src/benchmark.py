@@ -0,0 +1,207 @@
+import os
+import re
+import json
+import time
+import argparse
+import contextlib
+
+import pdf_parser
+import synthetic
+from metrics import ParseMetrics, StageTimer
+
+# Standard-Größen der Benchmark-Suite (Anzahl Spiele)
+DEFAULT_SIZES = [100, 10_000, 100_000]
+
+
+@contextlib.contextmanager
+def _quiet():
+    """Unterdrückt die Fortschrittsausgaben des Parsers während der Messung"""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def bench_stages(n_games, seed=0):
+    """Misst die Regex-Stufen auf synthetischen Seitentexten (ohne PDF-Dekodierung).
+
+    Die Texte werden Spiel für Spiel erzeugt, der Speicherbedarf bleibt
+    konstant. Jedes Ergebnis wird mit den simulierten Daten verglichen.
+    """
+    metrics = ParseMetrics()
+    mismatches = 0
+    with _quiet():
+        for league, game_info, players, events in synthetic.iter_games(n_games, seed):
+            pages = synthetic.page_texts(synthetic.report_lines(game_info, players, events))
+            pdf_file = os.path.join(league, f"{game_info['spielnummer']}.pdf")
+
+            timer = StageTimer(pdf_file)
+            with timer.stage('sektionen'):
+                sections, _ = pdf_parser.locate_sections(iter(pages))
+            parsed = pdf_parser.parse_sections(sections, pdf_file, timer)
+            metrics.add(timer.finish(quelle='text'))
+
+            for row in [parsed[0]] + parsed[1] + parsed[2]:
+                row.pop('pdf_file')
+            mismatches += parsed != (game_info, players, events)
+
+    return _result('stufen', n_games, metrics, mismatches=mismatches)
+
+
+# Vorgänger von pdf_parser.EVENT_PATTERN: ein finditer-Durchlauf je Ereignistyp
+_EVENT_END = r"(?=\s+(?:Heim|Gast)\s+\d{2}:\d{2}|\s+\d{2}:\d{2}\s+Auszeit|$)"
+_PER_TYPE_PATTERNS = [
+    (ereignis, re.compile(r"(Heim|Gast)\s+(\d{2}:\d{2})\s+" + keyword + r"\s+(\d+)\s+([^\n\r]+?)" + _EVENT_END))
+    for ereignis, keyword in [('Tor', r"(\d+):(\d+)\s+Tor"), ('7m-Tor', r"(\d+):(\d+)\s+7m\s+mit\s+Tor"),
+                              ('7m-Fehlwurf', r"(\d+):(\d+)\s+7m\s+ohne\s+Tor"),
+                              ('2-Minuten', r"()()2\s+Minuten"), ('Disqualifikation', r"()()ohne\s+Bericht")]
+]
+_AUSZEIT_PATTERN = re.compile(r"(\d{2}:\d{2})\s+Auszeit\s+(Heim|Gast)")
+
+
+def _events_per_type(text):
+    """Referenz für bench_events: Spielverlauf mit einem Durchlauf je Ereignistyp (wie vor EVENT_PATTERN)"""
+    spielverlauf = pdf_parser.SPIELVERLAUF_PATTERN.search(text).group(1)
+    events = []
+    for ereignis, pattern in _PER_TYPE_PATTERNS:
+        for match in pattern.finditer(spielverlauf):
+            team, zeit, stand_heim, stand_gast, trikotnummer, spieler = match.groups()
+            events.append({'team': team, 'zeit': zeit,
+                           'stand_heim': int(stand_heim) if stand_heim else None,
+                           'stand_gast': int(stand_gast) if stand_gast else None,
+                           'ereignis': ereignis, 'trikotnummer': trikotnummer,
+                           'spieler': re.sub(r'\s+(Heim|Gast)\s+\d{2}:\d{2}.*', '', spieler.strip())})
+    for match in _AUSZEIT_PATTERN.finditer(spielverlauf):
+        events.append({'team': match.group(2), 'zeit': match.group(1), 'stand_heim': None, 'stand_gast': None,
+                       'ereignis': 'Auszeit', 'trikotnummer': None, 'spieler': None})
+    events.sort(key=lambda x: (x['zeit'], pdf_parser.EVENT_ORDER[x['ereignis']]))
+    return events
+
+
+def bench_events(n_games, seed=0):
+    """Vergleicht extract_game_events (ein Regex) mit einem Durchlauf je Ereignistyp.
+
+    Beide laufen auf demselben synthetischen Spielverlauf; abweichende
+    Ergebnisse werden als mismatches gezählt.
+    """
+    metrics = ParseMetrics()
+    mismatches = 0
+    with _quiet():
+        for league, game_info, players, events in synthetic.iter_games(n_games, seed):
+            pages = synthetic.page_texts(synthetic.report_lines(game_info, players, events))
+            sections, _ = pdf_parser.locate_sections(iter(pages))
+            text = sections['spielverlauf']
+
+            timer = StageTimer(os.path.join(league, f"{game_info['spielnummer']}.pdf"))
+            with timer.stage('ein_regex'):
+                single = pdf_parser.extract_game_events(text)
+            with timer.stage('je_typ'):
+                per_type = _events_per_type(text)
+            metrics.add(timer.finish(quelle='text'))
+            mismatches += single != per_type
+
+    stages = metrics.summary()['stufen']
+    return _result('ereignisse', n_games, metrics, elapsed=stages['ein_regex']['summe'], mismatches=mismatches,
+                   beschleunigung=stages['je_typ']['summe'] / stages['ein_regex']['summe'])
+
+
+def ensure_pdfs(n_games, work_dir, seed=0):
+    """Erzeugt die PDFs für einen Lauf (wiederverwendet, wenn schon vorhanden)"""
+    folder = os.path.join(work_dir, f"{n_games}_seed{seed}")
+    marker = os.path.join(folder, ".fertig")
+    if not os.path.exists(marker):
+        start = time.perf_counter()
+        synthetic.generate(folder, n_games, seed)
+        open(marker, "w").close()
+        print(f"   Erzeugung: {time.perf_counter() - start:.1f} s")
+    return folder
+
+
+def bench_end_to_end(n_games, work_dir, backend=pdf_parser.DEFAULT_BACKEND, jobs=1, seed=0):
+    """Misst parse_directory + build_dataframes auf echten PDFs (ohne Caches)"""
+    folder = ensure_pdfs(n_games, work_dir, seed)
+    metrics = ParseMetrics()
+
+    start = time.perf_counter()
+    with _quiet():
+        all_game_info, all_player_stats, all_events = pdf_parser.parse_directory(
+            folder, jobs=jobs, backend=backend, metrics=metrics)
+        parsed_at = time.perf_counter()
+        df_games, df_players, df_events = pdf_parser.build_dataframes(all_game_info, all_player_stats, all_events)
+    end = time.perf_counter()
+
+    return _result('end-to-end', n_games, metrics, elapsed=end - start,
+                   stages_extra={'dataframes': end - parsed_at},
+                   rows={'spiele': len(df_games), 'spieler': len(df_players), 'ereignisse': len(df_events)},
+                   backend=backend, jobs=jobs)
+
+
+def _result(mode, n_games, metrics, elapsed=None, stages_extra=None, **extra):
+    """Fasst eine Messung zusammen: Spiele/s gesamt und je Stufe, p50/p95 je Stufe"""
+    summary = metrics.summary()
+    stages = {}
+    for name, stats in summary['stufen'].items():
+        stages[name] = {
+            'spiele_pro_s': n_games / stats['summe'] if stats['summe'] else None,
+            'p50_ms': stats['p50'] * 1000,
+            'p95_ms': stats['p95'] * 1000,
+            'summe_s': stats['summe'],
+        }
+    for name, seconds in (stages_extra or {}).items():
+        stages[name] = {'spiele_pro_s': n_games / seconds if seconds else None,
+                        'p50_ms': None, 'p95_ms': None, 'summe_s': seconds}
+    if elapsed is None:
+        elapsed = stages['gesamt']['summe_s']
+    return dict(modus=mode, spiele=n_games, sekunden=elapsed,
+                spiele_pro_s=n_games / elapsed if elapsed else None, stufen=stages, **extra)
+
+
+def print_result(result):
+    """Gibt eine Messung als Tabelle aus"""
+    print(f"\n🏁 {result['modus']}: {result['spiele']} Spiele in {result['sekunden']:.2f} s "
+          f"→ {result['spiele_pro_s']:.0f} Spiele/s")
+    if result.get('mismatches'):
+        print(f"   ⚠ {result['mismatches']} Spiele weichen von den simulierten Daten ab")
+    if result.get('beschleunigung'):
+        print(f"   ein_regex ist {result['beschleunigung']:.2f}x so schnell wie je_typ")
+    print(f"   {'Stufe':<12} {'Spiele/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'Summe s':>9}")
+    for name, stats in result['stufen'].items():
+        p50 = f"{stats['p50_ms']:.2f}" if stats['p50_ms'] is not None else "-"
+        p95 = f"{stats['p95_ms']:.2f}" if stats['p95_ms'] is not None else "-"
+        rate = f"{stats['spiele_pro_s']:.0f}" if stats['spiele_pro_s'] else "-"
+        print(f"   {name:<12} {rate:>10} {p50:>8} {p95:>8} {stats['summe_s']:>9.2f}")
+
+
+def run_suite(sizes=DEFAULT_SIZES, mode="alle", work_dir=synthetic.SYNTHETIC_DIR,
+              backend=pdf_parser.DEFAULT_BACKEND, jobs=1, seed=0):
+    """Führt die Benchmarks für alle Größen aus und gibt die Ergebnisse als Liste zurück"""
+    results = []
+    for n_games in sizes:
+        if mode in ("alle", "stufen"):
+            results.append(bench_stages(n_games, seed))
+            print_result(results[-1])
+        if mode == "ereignisse":
+            results.append(bench_events(n_games, seed))
+            print_result(results[-1])
+        if mode in ("alle", "end-to-end"):
+            results.append(bench_end_to_end(n_games, work_dir, backend, jobs, seed))
+            print_result(results[-1])
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parser-Benchmark auf synthetischen Spielberichten")
+    parser.add_argument("--games", type=int, nargs="+", default=DEFAULT_SIZES, help="Anzahl Spiele je Lauf")
+    parser.add_argument("--mode", choices=["alle", "stufen", "end-to-end", "ereignisse"], default="alle",
+                        help="stufen = nur Regex-Stufen auf Text, end-to-end = PDFs parsen, "
+                             "ereignisse = EVENT_PATTERN gegen einen Durchlauf je Ereignistyp")
+    parser.add_argument("--work-dir", default=synthetic.SYNTHETIC_DIR, help="Ordner für die erzeugten PDFs")
+    parser.add_argument("--backend", choices=pdf_parser.BACKENDS, default=pdf_parser.DEFAULT_BACKEND,
+                        help="Textextraktion für end-to-end")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="Parallele Prozesse für end-to-end")
+    parser.add_argument("--seed", type=int, default=0, help="Zufalls-Seed")
+    parser.add_argument("--json", help="Ergebnisse zusätzlich als JSON speichern")
+    args = parser.parse_args()
+
+    results = run_suite(args.games, args.mode, args.work_dir, args.backend, args.jobs, args.seed)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
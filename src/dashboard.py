@@ -231,7 +231,7 @@ page = st.sidebar.radio(
 )
 
 st.sidebar.markdown("---")
-st.sidebar.info(f"📊 **Datenstand**\n\n{len(analyzer.df_games)} Spiele analysiert\n\n{len(analyzer.df_players.groupby(['name', 'team']).size())} Spieler")
+st.sidebar.info(f"📊 **Datenstand**\n\n{len(analyzer.df_games)} Spiele analysiert\n\n{len(analyzer.df_players.groupby(['name', 'team'], observed=True).size())} Spieler")
 
 # SEITE: ÜBERSICHT
 if page == "📊 Übersicht":
@@ -253,7 +253,7 @@ if page == "📊 Übersicht":
         st.metric("🏠 Heimsiegquote", f"{home_stats['heim_siegquote']:.1f}%")
     
     with col4:
-        total_players = len(analyzer.df_players.groupby(['name', 'team']).size())
+        total_players = len(analyzer.df_players.groupby(['name', 'team'], observed=True).size())
         st.metric("👥 Spieler gesamt", total_players)
     
     st.markdown("---")
@@ -440,7 +440,7 @@ elif page == "⚽ Spielverlauf":
         # Spiel-Selector mit mehr Infos
         game_options = {}
         for spielnr in spielnummern:
-            game = analyzer.df_games[analyzer.df_games['spielnummer'] == spielnr].iloc[0]
+            game = analyzer.game_index.game(spielnr)
             label = f"Spiel #{spielnr}: {game['heimmannschaft']} vs {game['gastmannschaft']} ({game['endstand_heim']}:{game['endstand_gast']})"
             game_options[label] = spielnr
         
@@ -448,7 +448,7 @@ elif page == "⚽ Spielverlauf":
         selected_game = game_options[selected_label]
         
         # Spielinfo
-        game_info = analyzer.df_games[analyzer.df_games['spielnummer'] == selected_game].iloc[0]
+        game_info = analyzer.game_index.game(selected_game)
         
         # Info-Cards
         col1, col2, col3 = st.columns(3)
@@ -498,11 +498,11 @@ elif page == "⚽ Spielverlauf":
         with col2:
             st.subheader("⚠️ Strafen & Auszeiten")
             # Alle Events für dieses Spiel
-            game_events = analyzer.df_events[analyzer.df_events['spielnummer'] == selected_game].copy()
+            game_events = analyzer.game_index.events(selected_game)
             penalties_disq = game_events[game_events['ereignis'].isin(['2-Minuten', 'Disqualifikation', 'Auszeit'])]
             
             if len(penalties_disq) > 0:
-                display_df = penalties_disq[['zeit', 'team', 'ereignis', 'spieler']].copy()
+                display_df = penalties_disq[['zeit', 'mannschaft', 'ereignis', 'spieler']].copy()
                 display_df.columns = ['Zeit', 'Team', 'Ereignis', 'Spieler']
                 display_df['Spieler'] = display_df['Spieler'].fillna('-')
                 st.dataframe(display_df, width='stretch', hide_index=True, height=400)
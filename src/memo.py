@@ -0,0 +1,91 @@
+import functools
+import inspect
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# Maximale Anzahl gecachter Ergebnisse (über alle Analyzer-Instanzen)
+MEMO_SIZE = 256
+
+
+class MemoCache:
+    """LRU-Cache für Analyse-Ergebnisse, geteilt von allen Analyzer-Instanzen.
+
+    Schlüssel sind (Datenversion, Methode, Argumente). Instanzen auf
+    denselben Daten teilen sich damit die Ergebnisse, geänderte Daten
+    bekommen eine neue Version und treffen nie alte Einträge.
+    """
+
+    def __init__(self, maxsize=MEMO_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None, False
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key], True
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, version=None):
+        """Entfernt alle Einträge einer Datenversion (ohne Angabe: alle)"""
+        with self._lock:
+            if version is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[0] == version]:
+                del self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+MEMO_CACHE = MemoCache()
+
+
+def _read_only(value):
+    """Gibt Aufrufern eine eigene Kopie, damit der geteilte Cache unverändert bleibt"""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy()
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
+
+def memoized(method):
+    """Cacht das Ergebnis einer Analyzer-Methode je Datenversion und Argumenten.
+
+    Die Instanz muss data_version bereitstellen (siehe HandballAnalyzer).
+    Argumente werden über die Signatur normalisiert, f(10) und f(top_n=10)
+    treffen also denselben Eintrag. Nicht hashbare Argumente umgehen den Cache.
+    """
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        key = (self.data_version, method.__name__, tuple(list(bound.arguments.items())[1:]))
+        try:
+            value, found = MEMO_CACHE.get(key)
+        except TypeError:
+            return method(self, *args, **kwargs)
+        if not found:
+            value = method(self, *args, **kwargs)
+            MEMO_CACHE.put(key, value)
+        return _read_only(value)
+
+    return wrapper
@@ -0,0 +1,119 @@
+import json
+import math
+import time
+from contextlib import contextmanager, nullcontext
+
+# Anzahl der langsamsten PDFs in der Zusammenfassung
+TOP_SLOWEST = 10
+
+_NULL_CONTEXT = nullcontext()
+
+
+class NullTimer:
+    """Platzhalter, wenn keine Metriken erfasst werden (praktisch kostenlos)"""
+
+    def stage(self, name):
+        return _NULL_CONTEXT
+
+    def count(self, name, value):
+        pass
+
+
+NULL_TIMER = NullTimer()
+
+
+class StageTimer:
+    """Misst Dauer (Sekunden) und Zeilenzahlen der einzelnen Stufen eines PDFs.
+
+    Mehrfach betretene Stufen (z.B. 'text' pro Seite) werden aufsummiert.
+    """
+
+    def __init__(self, pdf_file):
+        self.record = {'pdf_file': pdf_file, 'stages': {}, 'rows': {}}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            stages = self.record['stages']
+            stages[name] = stages.get(name, 0.0) + time.perf_counter() - start
+
+    def count(self, name, value):
+        self.record['rows'][name] = self.record['rows'].get(name, 0) + value
+
+    def finish(self, **extra):
+        """Schließt die Messung ab und gibt den Datensatz (JSON-fähig) zurück"""
+        self.record['total'] = time.perf_counter() - self._start
+        self.record.update(extra)
+        return self.record
+
+
+def percentile(values, q):
+    """Perzentil nach Nearest-Rank (q in Prozent)"""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class ParseMetrics:
+    """Sammelt die Datensätze aller PDFs und schreibt sie als JSON-Lines.
+
+    Ohne Pfad werden die Datensätze nur für die Zusammenfassung gehalten.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.records = []
+        self._file = open(path, "w", encoding="utf-8") if path else None
+
+    def timer(self, pdf_file):
+        return StageTimer(pdf_file)
+
+    def add(self, record):
+        self.records.append(record)
+        if self._file is not None:
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def summary(self):
+        """Langsamste PDFs sowie p50/p95 je Stufe als Dict"""
+        stage_values = {}
+        for record in self.records:
+            for name, seconds in record['stages'].items():
+                stage_values.setdefault(name, []).append(seconds)
+        totals = [r['total'] for r in self.records]
+        stage_values['gesamt'] = totals
+        return {
+            'pdfs': len(self.records),
+            'langsamste': sorted(self.records, key=lambda r: r['total'], reverse=True)[:TOP_SLOWEST],
+            'stufen': {name: {'p50': percentile(values, 50), 'p95': percentile(values, 95),
+                              'summe': sum(values), 'anzahl': len(values)}
+                       for name, values in stage_values.items()},
+        }
+
+    def print_summary(self):
+        """Gibt die Zusammenfassung am Ende eines Laufs aus"""
+        summary = self.summary()
+        if not summary['pdfs']:
+            return summary
+
+        print(f"\n⏱️  Metriken für {summary['pdfs']} PDFs" + (f" ({self.path})" if self.path else ""))
+        print(f"   {'Stufe':<12} {'p50 ms':>9} {'p95 ms':>9} {'Summe s':>9}")
+        for name, stats in summary['stufen'].items():
+            print(f"   {name:<12} {stats['p50'] * 1000:>9.1f} {stats['p95'] * 1000:>9.1f} {stats['summe']:>9.2f}")
+
+        print(f"\n🐢 Langsamste PDFs:")
+        for record in summary['langsamste']:
+            slowest = max(record['stages'].items(), key=lambda item: item[1], default=("-", 0.0))
+            print(f"   {record['total'] * 1000:8.1f} ms  {record['pdf_file']}  "
+                  f"(meiste Zeit: {slowest[0]}, {record.get('quelle', '-')})")
+        return summary
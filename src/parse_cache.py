@@ -0,0 +1,104 @@
+import os
+import gzip
+import json
+import hashlib
+
+# Standardordner für Parse- und Text-Cache
+CACHE_DIR = "../data/cache/parse"
+TEXT_CACHE_DIR = "../data/cache/text"
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(path):
+    """Berechnet den SHA-256 einer Datei blockweise"""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class ParseCache:
+    """Speichert die extrahierten Datensätze eines PDFs unter SHA-256 + Parser-Version.
+
+    Jeder Eintrag ist eine JSON-Datei mit Spielinfo, Spielern und Ereignissen.
+    Ändert sich die Parser-Version, werden alte Einträge einfach nicht mehr
+    gefunden und beim nächsten Lauf neu erzeugt.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, version=1):
+        self.cache_dir = cache_dir
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, sha256):
+        return os.path.join(self.cache_dir, sha256[:2], f"{sha256}-v{self.version}.json")
+
+    def contains(self, sha256):
+        """True, wenn ein Eintrag existiert (ohne ihn zu laden)"""
+        return os.path.exists(self._path(sha256))
+
+    def get(self, sha256, pdf_file=None):
+        """Gibt (Spielinfo, Spieler, Ereignisse) aus dem Cache zurück oder None"""
+        try:
+            with open(self._path(sha256), encoding="utf-8") as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        game_info, players, events = record['game_info'], record['players'], record['events']
+        if pdf_file is not None:
+            # Gleicher Inhalt kann unter einem anderen Dateinamen liegen
+            for row in [game_info] + players + events:
+                row['pdf_file'] = pdf_file
+        return game_info, players, events
+
+    def put(self, sha256, game_info, players, events):
+        """Legt die Datensätze eines PDFs atomar im Cache ab"""
+        path = self._path(sha256)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({'version': self.version, 'game_info': game_info,
+                       'players': players, 'events': events}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+class TextCache:
+    """Komprimierter, inhaltsadressierter Cache für extrahierte Seitentexte.
+
+    Schlüssel ist der SHA-256 des PDFs plus das Extraktions-Backend. So können
+    die Regex-Stufen neu laufen, ohne die PDFs erneut zu dekodieren.
+    """
+
+    def __init__(self, cache_dir=TEXT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, sha256, backend):
+        return os.path.join(self.cache_dir, sha256[:2], f"{sha256}-{backend}.json.gz")
+
+    def get(self, sha256, backend):
+        """Gibt die Seitentexte als Liste zurück oder None"""
+        try:
+            with gzip.open(self._path(sha256, backend), "rt", encoding="utf-8") as f:
+                pages = json.load(f)
+        except (OSError, ValueError, EOFError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return pages
+
+    def put(self, sha256, backend, pages):
+        """Legt die Seitentexte atomar und gzip-komprimiert ab"""
+        path = self._path(sha256, backend)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(pages, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
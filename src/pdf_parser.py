@@ -1,12 +1,43 @@
-import pdfplumber
 import pandas as pd
 import os
 import re
+import gzip
+import json
+import heapq
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
 from datetime import datetime
 
+import audit
+import storage
+from parse_cache import ParseCache, TextCache, file_sha256, CACHE_DIR, TEXT_CACHE_DIR
+from metrics import NULL_TIMER, ParseMetrics, StageTimer
+from text_backend import iter_pages, available_backends, BACKENDS, DEFAULT_BACKEND, PDFPLUMBER, PDFIUM
+
 RAW_DIR = "../data/raw"
 PROCESSED_DIR = "../data/processed"
-os.makedirs(PROCESSED_DIR, exist_ok=True)
+
+# Bei jeder Änderung an den Extraktionsregeln erhöhen (macht den Parse-Cache ungültig)
+PARSER_VERSION = 1
+
+# PDFs pro Batch beim streamenden Schreiben
+STREAM_BATCH_SIZE = 256
+
+# Verteiltes Parsen: Ordner und Dateien der einzelnen Shards
+SHARDS_DIR = "shards"
+SHARD_RECORDS = "records.jsonl.gz"
+SHARD_MANIFEST = "shard.json"
+
+def list_pdf_files(raw_dir):
+    """Listet alle PDFs in raw_dir inkl. Liga-Unterordnern (relative Pfade, sortiert)"""
+    pdf_files = []
+    for root, _, files in os.walk(raw_dir):
+        for name in files:
+            if name.endswith(".pdf"):
+                pdf_files.append(os.path.relpath(os.path.join(root, name), raw_dir))
+    return sorted(pdf_files)
 
 def extract_game_info(text):
     """Extrahiert Basisinformationen über das Spiel"""
@@ -138,221 +169,732 @@ def extract_all_players(text, heim_team, gast_team):
     
     return heim_players + gast_players
 
+# Spielverlauf: alle Ereignistypen in einem einzigen Regex, damit der Block
+# nur einmal durchlaufen wird. Ein Ereignis endet vor dem nächsten Team/Zeit-
+# Paar oder einer Auszeit (PDF-Extraktion bricht Zeilen oft falsch um).
+SPIELVERLAUF_PATTERN = re.compile(r"Spielverlauf\s*\n(.*?)(?=nu\.Dokument|$)", re.DOTALL)
+EVENT_PATTERN = re.compile(
+    r"(?P<team>Heim|Gast)\s+(?P<zeit>\d{2}:\d{2})\s+"
+    r"(?:(?P<stand_heim>\d+):(?P<stand_gast>\d+)\s+(?P<wurf>Tor|7m\s+mit\s+Tor|7m\s+ohne\s+Tor)"
+    r"|(?P<strafe>2\s+Minuten|ohne\s+Bericht))"
+    r"\s+(?P<trikotnummer>\d+)\s+(?P<spieler>[^\n\r]+?)"
+    r"(?=\s+(?:Heim|Gast)\s+\d{2}:\d{2}|\s+\d{2}:\d{2}\s+Auszeit|$)"
+    r"|(?P<auszeit_zeit>\d{2}:\d{2})\s+Auszeit\s+(?P<auszeit_team>Heim|Gast)"
+)
+
+# Ereignisname je Schlüsselwort (Leerraum normalisiert)
+EVENT_TYPES = {
+    'Tor': 'Tor',
+    '7m mit Tor': '7m-Tor',
+    '7m ohne Tor': '7m-Fehlwurf',
+    '2 Minuten': '2-Minuten',
+    'ohne Bericht': 'Disqualifikation',
+}
+
+# Reihenfolge bei gleicher Spielzeit (wie bisher: Tore, 7m, Strafen, Auszeiten)
+EVENT_ORDER = {name: rank for rank, name in enumerate(
+    ['Tor', '7m-Tor', '7m-Fehlwurf', '2-Minuten', 'Disqualifikation', 'Auszeit'])}
+
 def extract_game_events(text):
     """Extrahiert alle Spielereignisse aus dem Spielverlauf"""
     events = []
     
     # Suche den Spielverlauf-Bereich
-    match = re.search(r"Spielverlauf\s*\n(.*?)(?=nu\.Dokument|$)", text, re.DOTALL)
+    match = SPIELVERLAUF_PATTERN.search(text)
     if not match:
         print("  ⚠ Spielverlauf nicht gefunden")
         return events
     
-    spielverlauf = match.group(1)
-    
-    # Finde alle Events mit finditer (nicht Zeilen-basiert!)
-    # Das ist wichtig, weil PDF-Extraktion oft Zeilen falsch umbricht
-    
-    # Normales Tor: Team Zeit Stand Tor Nummer Name
-    # WICHTIG: Nur bis zum nächsten Event oder Zeilenumbruch matchen
-    for match in re.finditer(r"(Heim|Gast)\s+(\d{2}:\d{2})\s+(\d+):(\d+)\s+Tor\s+(\d+)\s+([^\n\r]+?)(?=\s+(?:Heim|Gast)\s+\d{2}:\d{2}|\s+\d{2}:\d{2}\s+Auszeit|$)", spielverlauf):
-        spieler = match.group(6).strip()
-        # Entferne alles nach einem weiteren Team/Zeit Pattern
-        spieler = re.sub(r'\s+(Heim|Gast)\s+\d{2}:\d{2}.*', '', spieler)
+    # Ein Durchlauf über den Spielverlauf für alle Ereignistypen
+    for match in EVENT_PATTERN.finditer(match.group(1)):
+        if match.group('auszeit_zeit'):
+            events.append({
+                'team': match.group('auszeit_team'),
+                'zeit': match.group('auszeit_zeit'),
+                'stand_heim': None,
+                'stand_gast': None,
+                'ereignis': 'Auszeit',
+                'trikotnummer': None,
+                'spieler': None
+            })
+            continue
         
+        wurf = match.group('wurf')
+        keyword = wurf or match.group('strafe')
         events.append({
-            'team': match.group(1),
-            'zeit': match.group(2),
-            'stand_heim': int(match.group(3)),
-            'stand_gast': int(match.group(4)),
-            'ereignis': 'Tor',
-            'trikotnummer': match.group(5),
-            'spieler': spieler
+            'team': match.group('team'),
+            'zeit': match.group('zeit'),
+            'stand_heim': int(match.group('stand_heim')) if wurf else None,
+            'stand_gast': int(match.group('stand_gast')) if wurf else None,
+            'ereignis': EVENT_TYPES[' '.join(keyword.split())],
+            'trikotnummer': match.group('trikotnummer'),
+            'spieler': match.group('spieler').strip()
         })
     
-    # 7-Meter mit Tor
-    for match in re.finditer(r"(Heim|Gast)\s+(\d{2}:\d{2})\s+(\d+):(\d+)\s+7m\s+mit\s+Tor\s+(\d+)\s+([^\n\r]+?)(?=\s+(?:Heim|Gast)\s+\d{2}:\d{2}|\s+\d{2}:\d{2}\s+Auszeit|$)", spielverlauf):
-        spieler = match.group(6).strip()
-        spieler = re.sub(r'\s+(Heim|Gast)\s+\d{2}:\d{2}.*', '', spieler)
-        
-        events.append({
-            'team': match.group(1),
-            'zeit': match.group(2),
-            'stand_heim': int(match.group(3)),
-            'stand_gast': int(match.group(4)),
-            'ereignis': '7m-Tor',
-            'trikotnummer': match.group(5),
-            'spieler': spieler
-        })
+    # Sortiere Events nach Zeit
+    events.sort(key=lambda x: (x['zeit'], EVENT_ORDER[x['ereignis']]))
+    print(f"  ✓ {len(events)} Ereignisse extrahiert")
     
-    # 7-Meter ohne Tor
-    for match in re.finditer(r"(Heim|Gast)\s+(\d{2}:\d{2})\s+(\d+):(\d+)\s+7m\s+ohne\s+Tor\s+(\d+)\s+([^\n\r]+?)(?=\s+(?:Heim|Gast)\s+\d{2}:\d{2}|\s+\d{2}:\d{2}\s+Auszeit|$)", spielverlauf):
-        spieler = match.group(6).strip()
-        spieler = re.sub(r'\s+(Heim|Gast)\s+\d{2}:\d{2}.*', '', spieler)
-        
-        events.append({
-            'team': match.group(1),
-            'zeit': match.group(2),
-            'stand_heim': int(match.group(3)),
-            'stand_gast': int(match.group(4)),
-            'ereignis': '7m-Fehlwurf',
-            'trikotnummer': match.group(5),
-            'spieler': spieler
-        })
+    return events
+
+# Seitenmarker für die lazy Sektionssuche
+ROSTER_START_PATTERN = re.compile(r"(?:Heim|Gast)mannschaft\s*\n")
+SPIELVERLAUF_START_PATTERN = re.compile(r"Spielverlauf\s*\n")
+SPIELVERLAUF_END = "nu.Dokument"
+
+def locate_sections(pages):
+    """Liest Seiten nur so lange, bis alle Sektionen gefunden sind.
+
+    pages ist ein (lazy) Iterator über Seitentexte. Sobald der Spielverlauf
+    samt Dokument-Fußzeile gefunden ist, werden keine weiteren Seiten mehr
+    gelesen. Gibt (Sektionen, gelesene Seiten) zurück; die Sektionen 'kopf',
+    'kader' und 'spielverlauf' enthalten jeweils nur die Seiten, auf denen
+    sie liegen können.
+    """
+    decoded = []
+    roster_page = None
+    verlauf_page = None
     
-    # 2-Minuten Strafe
-    for match in re.finditer(r"(Heim|Gast)\s+(\d{2}:\d{2})\s+2\s+Minuten\s+(\d+)\s+([^\n\r]+?)(?=\s+(?:Heim|Gast)\s+\d{2}:\d{2}|\s+\d{2}:\d{2}\s+Auszeit|$)", spielverlauf):
-        spieler = match.group(4).strip()
-        spieler = re.sub(r'\s+(Heim|Gast)\s+\d{2}:\d{2}.*', '', spieler)
+    for i, page_text in enumerate(pages):
+        decoded.append(page_text)
+        page_text += "\n"
         
-        events.append({
-            'team': match.group(1),
-            'zeit': match.group(2),
-            'stand_heim': None,
-            'stand_gast': None,
-            'ereignis': '2-Minuten',
-            'trikotnummer': match.group(3),
-            'spieler': spieler
-        })
-    
-    # Disqualifikation
-    for match in re.finditer(r"(Heim|Gast)\s+(\d{2}:\d{2})\s+ohne\s+Bericht\s+(\d+)\s+([^\n\r]+?)(?=\s+(?:Heim|Gast)\s+\d{2}:\d{2}|\s+\d{2}:\d{2}\s+Auszeit|$)", spielverlauf):
-        spieler = match.group(4).strip()
-        spieler = re.sub(r'\s+(Heim|Gast)\s+\d{2}:\d{2}.*', '', spieler)
+        if roster_page is None and ROSTER_START_PATTERN.search(page_text):
+            roster_page = i
         
-        events.append({
-            'team': match.group(1),
-            'zeit': match.group(2),
-            'stand_heim': None,
-            'stand_gast': None,
-            'ereignis': 'Disqualifikation',
-            'trikotnummer': match.group(3),
-            'spieler': spieler
-        })
+        if verlauf_page is None:
+            match = SPIELVERLAUF_START_PATTERN.search(page_text)
+            if not match:
+                continue
+            verlauf_page = i
+            page_text = page_text[match.end():]
+        
+        if SPIELVERLAUF_END in page_text:
+            break
     
-    # Auszeit
-    for match in re.finditer(r"(\d{2}:\d{2})\s+Auszeit\s+(Heim|Gast)", spielverlauf):
-        events.append({
-            'team': match.group(2),
-            'zeit': match.group(1),
-            'stand_heim': None,
-            'stand_gast': None,
-            'ereignis': 'Auszeit',
-            'trikotnummer': None,
-            'spieler': None
-        })
+    def join(start, end=None):
+        return "".join(page_text + "\n" for page_text in decoded[start:end])
     
-    # Sortiere Events nach Zeit
-    events.sort(key=lambda x: x['zeit'])
-    print(f"  ✓ {len(events)} Ereignisse extrahiert")
-    
-    return events
+    sections = {
+        # Kopfdaten stehen vor dem ersten Kader (Gastmannschaft-Regex braucht dessen Überschrift)
+        'kopf': join(0, roster_page + 1 if roster_page is not None else None),
+        'kader': join(roster_page or 0),
+        'spielverlauf': join(verlauf_page or 0),
+    }
+    return sections, decoded
 
-# Hauptverarbeitung
-all_game_info = []
-all_player_stats = []
-all_events = []
+def read_sections(pdf_path, backend=DEFAULT_BACKEND, text_cache=None, sha256=None, timer=NULL_TIMER):
+    """Dekodiert nur die benötigten Seiten eines PDFs und gibt die Sektionen zurück.
 
-for pdf_file in os.listdir(RAW_DIR):
-    if not pdf_file.endswith(".pdf"):
-        continue
+    Mit Text-Cache werden die gelesenen Seiten zwischengespeichert und bei
+    einem Treffer gar nicht mehr dekodiert.
+    """
+    pages = None
+    if text_cache is not None:
+        with timer.stage('text_cache'):
+            sha256 = sha256 or file_sha256(pdf_path)
+            pages = text_cache.get(sha256, backend)
+    
+    if pages is not None:
+        with timer.stage('sektionen'):
+            sections, decoded = locate_sections(iter(pages))
+        timer.count('seiten', len(decoded))
+        return sections
+    
+    page_iter = iter_pages(pdf_path, backend, timer)
+    try:
+        sections, decoded = locate_sections(page_iter)
+    finally:
+        page_iter.close()
+    timer.count('seiten', len(decoded))
     
-    pdf_path = os.path.join(RAW_DIR, pdf_file)
+    if text_cache is not None:
+        with timer.stage('text_cache'):
+            text_cache.put(sha256, backend, decoded)
+    return sections
+
+def parse_pdf(pdf_path, pdf_file=None, backend=DEFAULT_BACKEND, text_cache=None, sha256=None, timer=NULL_TIMER):
+    """Verarbeitet einen Spielbericht und gibt (Spielinfo, Spieler, Ereignisse) zurück.
+
+    timer (siehe metrics.StageTimer) erfasst Dauer und Zeilenzahl je Stufe.
+    """
+    pdf_file = pdf_file or os.path.basename(pdf_path)
     print(f"\n📄 Verarbeite: {pdf_file}")
     
-    with pdfplumber.open(pdf_path) as pdf:
-        # Gesamten Text extrahieren
-        text = ""
-        for page in pdf.pages:
-            text += page.extract_text() + "\n"
-        
-        # Spielinformationen
-        game_info = extract_game_info(text)
-        game_info['pdf_file'] = pdf_file
-        all_game_info.append(game_info)
-        
-        print(f"  ✓ Spiel: {game_info.get('heimmannschaft')} vs {game_info.get('gastmannschaft')}")
-        
-        # Spielerstatistiken - NEUE METHODE
+    sections = read_sections(pdf_path, backend, text_cache, sha256, timer)
+    return parse_sections(sections, pdf_file, timer)
+
+def parse_sections(sections, pdf_file, timer=NULL_TIMER):
+    """Regex-Stufen: Spielinfo, Spieler und Ereignisse aus den Sektionstexten"""
+    # Spielinformationen
+    with timer.stage('spielinfo'):
+        game_info = extract_game_info(sections['kopf'])
+    game_info['pdf_file'] = pdf_file
+    
+    print(f"  ✓ Spiel: {game_info.get('heimmannschaft')} vs {game_info.get('gastmannschaft')}")
+    
+    # Spielerstatistiken - NEUE METHODE
+    with timer.stage('spieler'):
         players = extract_all_players(
-            text, 
+            sections['kader'], 
             game_info.get('heimmannschaft'),
             game_info.get('gastmannschaft')
         )
+    timer.count('spieler', len(players))
+    
+    for player in players:
+        player['pdf_file'] = pdf_file
+        player['spielnummer'] = game_info.get('spielnummer')
+    
+    # Spielereignisse
+    with timer.stage('ereignisse'):
+        events = extract_game_events(sections['spielverlauf'])
+    timer.count('ereignisse', len(events))
+    for event in events:
+        event['pdf_file'] = pdf_file
+        event['spielnummer'] = game_info.get('spielnummer')
+    
+    return game_info, players, events
+
+def build_dataframes(all_game_info, all_player_stats, all_events):
+    """Erstellt typisierte DataFrames aus den gesammelten Datensätzen"""
+    df_games = pd.DataFrame(all_game_info)
+    df_players = pd.DataFrame(all_player_stats)
+    df_events = pd.DataFrame(all_events)
+    
+    # Datentypen anpassen
+    df_games = df_games.astype({
+        'endstand_heim': 'Int64',
+        'endstand_gast': 'Int64',
+        'halbzeit_heim': 'Int64',
+        'halbzeit_gast': 'Int64'
+    })
+    
+    # Spieler-Datentypen
+    df_players = df_players.astype({
+        'tore': 'Int64',
+        'siebenmeter_tore': 'Int64',
+        'siebenmeter_versuche': 'Int64',
+        'zweiminuten_strafen': 'Int64',
+        'gelbe_karten': 'Int64'
+    })
+    
+    df_events['stand_heim'] = df_events['stand_heim'].astype('Int64')
+    df_events['stand_gast'] = df_events['stand_gast'].astype('Int64')
+    
+    # Duplikate entfernen (falls trotzdem welche entstehen)
+    df_players = df_players.drop_duplicates(subset=['spielnummer', 'team', 'trikotnummer'], keep='first')
+    
+    return df_games, df_players, df_events
+
+def save_csvs(df_games, df_players, df_events, processed_dir=PROCESSED_DIR):
+    """Speichert die drei Tabellen als CSV und gibt die Pfade zurück"""
+    os.makedirs(processed_dir, exist_ok=True)
+    
+    games_csv = os.path.join(processed_dir, "spiele.csv")
+    players_csv = os.path.join(processed_dir, "spieler_statistiken.csv")
+    events_csv = os.path.join(processed_dir, "spielereignisse.csv")
+    
+    df_games.to_csv(games_csv, index=False, encoding='utf-8-sig')
+    df_players.to_csv(players_csv, index=False, encoding='utf-8-sig')
+    df_events.to_csv(events_csv, index=False, encoding='utf-8-sig')
+    
+    return games_csv, players_csv, events_csv
+
+def validate(df_players):
+    """Prüft auf doppelte Spieler und gibt die Team-Größen aus"""
+    print(f"\n🔍 Validierung:")
+    # Prüfe auf echte Duplikate (gleiche Spielnummer, Team UND Trikotnummer)
+    duplicates = df_players.groupby(['spielnummer', 'team', 'trikotnummer']).size()
+    if (duplicates > 1).any():
+        print(f"⚠️  WARNUNG: {(duplicates > 1).sum()} Spieler erscheinen mehrfach!")
+        dup_mask = df_players.duplicated(subset=['spielnummer', 'team', 'trikotnummer'], keep=False)
+        print(df_players[dup_mask][['name', 'team', 'trikotnummer', 'spielnummer']])
+    else:
+        print(f"✅ Keine Duplikate gefunden!")
         
-        for player in players:
-            player['pdf_file'] = pdf_file
-            player['spielnummer'] = game_info.get('spielnummer')
-        all_player_stats.extend(players)
+    # Prüfe Team-Größen
+    print_team_sizes(df_players.groupby(['spielnummer', 'team']).size().items())
+
+def print_team_sizes(team_sizes):
+    """Gibt die Anzahl Spieler je (Spiel, Team) aus"""
+    print(f"\n📋 Team-Größen:")
+    for (spiel, team), count in team_sizes:
+        print(f"   Spiel {spiel} - {team}: {count} Spieler")
+
+def write_outputs(all_game_info, all_player_stats, all_events, processed_dir=PROCESSED_DIR, sqlite=False):
+    """Baut die DataFrames, speichert die CSVs (und ggf. SQLite) und validiert das Ergebnis"""
+    print(f"\n📊 Erstelle CSVs...")
+    
+    df_games, df_players, df_events = build_dataframes(all_game_info, all_player_stats, all_events)
+    
+    print(f"  ✓ {len(df_games)} Spiele")
+    print(f"  ✓ {len(df_players)} Spieler (nach Duplikat-Entfernung)")
+    print(f"  ✓ {len(df_events)} Ereignisse")
+    
+    # Speichern
+    games_csv, players_csv, events_csv = save_csvs(df_games, df_players, df_events, processed_dir)
+    tables = {'games': df_games, 'players': df_players, 'events': df_events}
+    parquet_files = storage.save_parquet(tables, processed_dir)
+    arrow_files = storage.save_arrow(tables, processed_dir)
+    
+    print(f"\n✅ Erfolgreich verarbeitet!")
+    print(f"📊 {games_csv}")
+    print(f"👥 {players_csv}")
+    print(f"⚡ {events_csv}")
+    if parquet_files:
+        print(f"🗜️  Parquet: {', '.join(os.path.basename(p) for p in parquet_files)}")
+    if arrow_files:
+        print(f"🗺️  Arrow-IPC: {', '.join(os.path.basename(p) for p in arrow_files)}")
+    if sqlite:
+        print(f"🗃️  SQLite: {storage.save_sqlite(tables, processed_dir)}")
+    
+    # Validierung
+    validate(df_players)
+    
+    return df_games, df_players, df_events
+
+def write_streaming(results, processed_dir=PROCESSED_DIR, batch_size=STREAM_BATCH_SIZE, sqlite=False, resume=False):
+    """Schreibt Parse-Ergebnisse batchweise, statt erst alle Datensätze zu sammeln.
+
+    results ist ein Iterable von (Spielinfo, Spieler, Ereignisse), z.B.
+    iter_parse_results. Nach je batch_size PDFs werden die Datensätze typisiert
+    und an CSV/Parquet (mit sqlite=True auch SQLite) angehängt (siehe
+    storage.TableSink); die Team-Größen werden je Batch ausgegeben. Bricht
+    der Lauf ab, bleiben die fertigen Batches im Journal, resume=True spielt
+    sie wieder ein (results sollte deren PDFs dann auslassen, siehe
+    storage.journal_pdf_files). Gibt die Anzahl geschriebener Zeilen je
+    Tabelle zurück.
+    """
+    print(f"\n📊 Schreibe CSVs batchweise (je {batch_size} PDFs)...")
+    
+    def flush(batch):
+        players = [p for r in batch for p in r[1]]
+        df_games, df_players, df_events = build_dataframes(
+            [r[0] for r in batch], players, [e for r in batch for e in r[2]]
+        )
+        # build_dataframes verwirft Duplikate innerhalb des Batches, der Sink die batchübergreifenden
+        written = sink.write_batch(df_games, df_players, df_events, duplicates=len(players) - len(df_players))
+        print_team_sizes(written.groupby(['spielnummer', 'team']).size().items())
+    
+    with storage.TableSink(processed_dir, sqlite=sqlite, resume=resume) as sink:
+        if sink.resumed_batches:
+            print(f"⏩ {sink.resumed_batches} fertige Batches aus {storage.journal_dir(processed_dir)} übernommen")
+        batch = []
+        try:
+            for result in results:
+                batch.append(result)
+                if len(batch) >= batch_size:
+                    flush(batch)
+                    batch = []
+            if batch:
+                flush(batch)
+        except BaseException:
+            print(f"\n❌ Abgebrochen: fertige Batches liegen in {storage.journal_dir(processed_dir)}, "
+                  f"fortsetzen mit --resume")
+            raise
+    
+    print(f"  ✓ {sink.rows['games']} Spiele")
+    print(f"  ✓ {sink.rows['players']} Spieler (nach Duplikat-Entfernung)")
+    print(f"  ✓ {sink.rows['events']} Ereignisse")
+    print(f"\n✅ Erfolgreich verarbeitet: {processed_dir}")
+    if sqlite:
+        print(f"🗃️  SQLite: {storage.sqlite_path(processed_dir)}")
+    
+    print(f"\n🔍 Validierung:")
+    if sink.duplicates:
+        print(f"⚠️  WARNUNG: {sink.duplicates} doppelte Spieler-Einträge verworfen!")
+    else:
+        print(f"✅ Keine Duplikate gefunden!")
+    
+    return sink.rows
+
+def _parse_job(job):
+    """Worker-Funktion für den Prozess-Pool (muss auf Modulebene liegen).
+
+    Gibt (Ergebnis, Metrik-Datensatz oder None) zurück.
+    """
+    raw_dir, pdf_file, backend, text_cache, sha256, with_metrics = job
+    if not with_metrics:
+        return parse_pdf(os.path.join(raw_dir, pdf_file), pdf_file, backend, text_cache, sha256), None
+    
+    timer = StageTimer(pdf_file)
+    result = parse_pdf(os.path.join(raw_dir, pdf_file), pdf_file, backend, text_cache, sha256, timer)
+    return result, timer.finish(quelle=backend)
+
+def parse_pdf_cached(pdf_path, pdf_file=None, cache=None, backend=DEFAULT_BACKEND, text_cache=None,
+                     timer=NULL_TIMER):
+    """Wie parse_pdf, nutzt aber Parse- und Text-Cache (falls angegeben)"""
+    if cache is None:
+        return parse_pdf(pdf_path, pdf_file, backend, text_cache, timer=timer)
+    
+    pdf_file = pdf_file or os.path.basename(pdf_path)
+    with timer.stage('parse_cache'):
+        sha256 = file_sha256(pdf_path)
+        cached = cache.get(sha256, pdf_file)
+    if cached is not None:
+        return cached
+    
+    result = parse_pdf(pdf_path, pdf_file, backend, text_cache, sha256, timer)
+    with timer.stage('parse_cache'):
+        cache.put(sha256, *result)
+    return result
+
+def open_cache(cache_dir=CACHE_DIR, backend=DEFAULT_BACKEND):
+    """Erstellt den Parse-Cache für die aktuelle Parser-Version und das Backend"""
+    return ParseCache(cache_dir, version=f"{PARSER_VERSION}-{backend}")
+
+def open_text_cache(cache_dir=TEXT_CACHE_DIR):
+    """Erstellt den Cache für extrahierte Seitentexte"""
+    return TextCache(cache_dir)
+
+def iter_parse_results(raw_dir=RAW_DIR, jobs=1, cache=None, backend=DEFAULT_BACKEND, text_cache=None, skip=None,
+                       metrics=None, shard=None):
+    """Parst alle PDFs in raw_dir und liefert (Spielinfo, Spieler, Ereignisse) je PDF (Generator).
+
+    Die Reihenfolge folgt immer den sortierten Dateinamen, unabhängig von
+    jobs. Cache-Treffer werden erst beim Ausliefern geladen, es liegen also
+    nie alle Ergebnisse gleichzeitig im Speicher. Mit shard=(i, N) werden
+    nur die PDFs dieses Shards geparst (siehe in_shard). Übrige Parameter
+    wie bei parse_directory.
+    """
+    pdf_files = [f for f in list_pdf_files(raw_dir)
+                 if (not skip or f not in skip) and (shard is None or in_shard(f, shard))]
+    hashes = [None] * len(pdf_files)
+    cached = [False] * len(pdf_files)
+    
+    timers = [NULL_TIMER] * len(pdf_files)
+    
+    # Cache-Treffer merken, nur der Rest geht in den Pool
+    job_list = []
+    for i, pdf_file in enumerate(pdf_files):
+        if metrics is not None:
+            timers[i] = StageTimer(pdf_file)
+        if cache is not None or text_cache is not None:
+            with timers[i].stage('hash'):
+                hashes[i] = file_sha256(os.path.join(raw_dir, pdf_file))
+        if cache is not None:
+            with timers[i].stage('parse_cache'):
+                cached[i] = cache.contains(hashes[i])
+        if not cached[i]:
+            job_list.append((raw_dir, pdf_file, backend, text_cache, hashes[i], metrics is not None))
+    
+    with ExitStack() as stack:
+        if jobs > 1 and len(job_list) > 1:
+            chunksize = max(1, len(job_list) // (jobs * 4))
+            executor = stack.enter_context(ProcessPoolExecutor(max_workers=jobs))
+            parsed = executor.map(_parse_job, job_list, chunksize=chunksize)
+        else:
+            parsed = map(_parse_job, job_list)
         
-        # Spielereignisse
-        events = extract_game_events(text)
-        for event in events:
-            event['pdf_file'] = pdf_file
-            event['spielnummer'] = game_info.get('spielnummer')
+        for i, pdf_file in enumerate(pdf_files):
+            if cached[i]:
+                with timers[i].stage('parse_cache'):
+                    result = cache.get(hashes[i], pdf_file)
+                if result is not None:
+                    if metrics is not None:
+                        record = timers[i].finish(quelle='parse_cache')
+                        # Nur die eigenen Stufen zählen, nicht die Wartezeit seit dem Hashen
+                        record['total'] = sum(record['stages'].values())
+                        metrics.add(record)
+                    yield result
+                    continue
+                # Eintrag zwischen Prüfung und Laden verschwunden: hier parsen
+                result, record = _parse_job((raw_dir, pdf_file, backend, text_cache, hashes[i],
+                                             metrics is not None))
+            else:
+                result, record = next(parsed)
+            
+            if cache is not None:
+                with timers[i].stage('parse_cache'):
+                    cache.put(hashes[i], *result)
+            if record is not None:
+                # Zeiten aus dem Elternprozess (Hash, Cache) mit denen des Workers zusammenführen
+                for name, seconds in timers[i].record['stages'].items():
+                    record['stages'][name] = record['stages'].get(name, 0.0) + seconds
+                    record['total'] += seconds
+                metrics.add(record)
+            yield result
+    
+    if cache is not None:
+        print(f"\n🗄️  Parse-Cache: {cache.hits} Treffer, {len(job_list)} neu geparst")
+    if text_cache is not None and jobs <= 1:
+        print(f"🗄️  Text-Cache: {text_cache.hits} Treffer, {text_cache.misses} PDFs dekodiert")
+
+def parse_directory(raw_dir=RAW_DIR, jobs=1, cache=None, backend=DEFAULT_BACKEND, text_cache=None, skip=None,
+                    metrics=None):
+    """Parst alle PDFs in raw_dir, bei jobs > 1 verteilt auf einen Prozess-Pool.
+
+    Mit cache (siehe open_cache) werden nur neue oder geänderte PDFs geparst,
+    alle anderen kommen aus dem Parse-Cache. Mit text_cache (siehe
+    open_text_cache) wird der PDF-Text nur einmal dekodiert und danach nur
+    noch die Regex-Stufen ausgeführt.
+    Gibt (Spielinfos, Spieler, Ereignisse) als Listen von Dicts zurück. Die
+    Reihenfolge folgt immer den sortierten Dateinamen, unabhängig von jobs.
+    PDFs in skip (relative Pfade) werden gar nicht erst angefasst. Mit
+    metrics (siehe metrics.ParseMetrics) wird pro PDF ein Datensatz mit den
+    Stufen-Zeiten erfasst.
+    """
+    all_game_info = []
+    all_player_stats = []
+    all_events = []
+    for game_info, players, events in iter_parse_results(raw_dir, jobs, cache, backend, text_cache, skip, metrics):
+        all_game_info.append(game_info)
+        all_player_stats.extend(players)
         all_events.extend(events)
+    
+    return all_game_info, all_player_stats, all_events
+
+def in_shard(pdf_file, shard):
+    """True, wenn pdf_file zum Shard (i, N) gehört.
+
+    Entscheidet ein stabiler Hash des relativen Pfads, auf jeder Maschine
+    und in jedem Lauf gleich (anders als Pythons hash()).
+    """
+    index, count = shard
+    digest = hashlib.sha1(pdf_file.replace(os.sep, "/").encode("utf-8")).hexdigest()
+    return int(digest[:16], 16) % count == index
+
+def parse_shard_spec(spec):
+    """Wandelt 'i/N' in (i, N) um (für argparse)"""
+    try:
+        index, count = (int(part) for part in spec.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Shard muss das Format i/N haben, nicht '{spec}'")
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"Shard {spec}: es muss 0 <= i < N gelten")
+    return index, count
+
+def shard_name(shard):
+    index, count = shard
+    return f"shard-{index:04d}-of-{count:04d}"
 
-# CSVs erstellen
-print(f"\n📊 Erstelle CSVs...")
-
-df_games = pd.DataFrame(all_game_info)
-df_players = pd.DataFrame(all_player_stats)
-df_events = pd.DataFrame(all_events)
-
-# Datentypen anpassen
-df_games = df_games.astype({
-    'endstand_heim': 'Int64',
-    'endstand_gast': 'Int64',
-    'halbzeit_heim': 'Int64',
-    'halbzeit_gast': 'Int64'
-})
-
-# Spieler-Datentypen
-df_players = df_players.astype({
-    'tore': 'Int64',
-    'siebenmeter_tore': 'Int64',
-    'siebenmeter_versuche': 'Int64',
-    'zweiminuten_strafen': 'Int64',
-    'gelbe_karten': 'Int64'
-})
-
-df_events['stand_heim'] = df_events['stand_heim'].astype('Int64')
-df_events['stand_gast'] = df_events['stand_gast'].astype('Int64')
-
-# Duplikate entfernen (falls trotzdem welche entstehen)
-df_players = df_players.drop_duplicates(subset=['spielnummer', 'team', 'trikotnummer'], keep='first')
-
-print(f"  ✓ {len(df_games)} Spiele")
-print(f"  ✓ {len(df_players)} Spieler (nach Duplikat-Entfernung)")
-print(f"  ✓ {len(df_events)} Ereignisse")
-
-# Speichern
-games_csv = os.path.join(PROCESSED_DIR, "spiele.csv")
-players_csv = os.path.join(PROCESSED_DIR, "spieler_statistiken.csv")
-events_csv = os.path.join(PROCESSED_DIR, "spielereignisse.csv")
-
-df_games.to_csv(games_csv, index=False, encoding='utf-8-sig')
-df_players.to_csv(players_csv, index=False, encoding='utf-8-sig')
-df_events.to_csv(events_csv, index=False, encoding='utf-8-sig')
-
-print(f"\n✅ Erfolgreich verarbeitet!")
-print(f"📊 {games_csv}")
-print(f"👥 {players_csv}")
-print(f"⚡ {events_csv}")
-
-# Validierung
-print(f"\n🔍 Validierung:")
-# Prüfe auf echte Duplikate (gleiche Spielnummer, Team UND Trikotnummer)
-duplicates = df_players.groupby(['spielnummer', 'team', 'trikotnummer']).size()
-if (duplicates > 1).any():
-    print(f"⚠️  WARNUNG: {(duplicates > 1).sum()} Spieler erscheinen mehrfach!")
-    dup_mask = df_players.duplicated(subset=['spielnummer', 'team', 'trikotnummer'], keep=False)
-    print(df_players[dup_mask][['name', 'team', 'trikotnummer', 'spielnummer']])
-else:
-    print(f"✅ Keine Duplikate gefunden!")
-    
-# Prüfe Team-Größen
-team_sizes = df_players.groupby(['spielnummer', 'team']).size()
-print(f"\n📋 Team-Größen:")
-for (spiel, team), count in team_sizes.items():
-    print(f"   Spiel {spiel} - {team}: {count} Spieler")
\ No newline at end of file
+def write_shard(results, shards_dir, shard):
+    """Schreibt die Datensätze eines Shards als gzip-JSON-Lines (ein PDF pro Zeile).
+
+    Das Manifest entsteht erst, wenn alle Datensätze geschrieben sind; ein
+    abgebrochener Shard wird beim Zusammenführen daher als fehlend erkannt.
+    """
+    folder = os.path.join(shards_dir, shard_name(shard))
+    os.makedirs(folder, exist_ok=True)
+    manifest_path = os.path.join(folder, SHARD_MANIFEST)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+    
+    records_path = os.path.join(folder, SHARD_RECORDS)
+    tmp_path = f"{records_path}.tmp"
+    count = 0
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        for game_info, players, events in results:
+            f.write(json.dumps([game_info, players, events], ensure_ascii=False) + "\n")
+            count += 1
+    os.replace(tmp_path, records_path)
+    
+    with open(f"{manifest_path}.tmp", "w", encoding="utf-8") as f:
+        json.dump({'shard': shard[0], 'shards': shard[1], 'pdfs': count,
+                   'parser_version': PARSER_VERSION}, f)
+    os.replace(f"{manifest_path}.tmp", manifest_path)
+    
+    print(f"\n✅ Shard {shard[0]}/{shard[1]}: {count} PDFs → {folder}")
+    return count
+
+def _iter_shard_records(folder):
+    with gzip.open(os.path.join(folder, SHARD_RECORDS), "rt", encoding="utf-8") as f:
+        for line in f:
+            yield tuple(json.loads(line))
+
+def merge_shards(shards_dir, processed_dir=PROCESSED_DIR, batch_size=STREAM_BATCH_SIZE, sqlite=False):
+    """Führt alle Shards zu den drei Tabellen zusammen.
+
+    Die Datensätze werden nach Dateiname gemischt (wie bei einem Lauf auf
+    einer Maschine), danach laufen Duplikat-Entfernung und Validierung wie
+    gewohnt über write_streaming. Fehlt ein Shard oder passen die Shards
+    nicht zusammen, wird ein ValueError ausgelöst.
+    """
+    manifests = []
+    for name in sorted(os.listdir(shards_dir)):
+        manifest_path = os.path.join(shards_dir, name, SHARD_MANIFEST)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding="utf-8") as f:
+                manifests.append((os.path.join(shards_dir, name), json.load(f)))
+    
+    if not manifests:
+        raise ValueError(f"Keine fertigen Shards in {shards_dir}")
+    counts = {m['shards'] for _, m in manifests}
+    versions = {m['parser_version'] for _, m in manifests}
+    if len(counts) != 1 or len(versions) != 1:
+        raise ValueError(f"Shards passen nicht zusammen (N={sorted(counts)}, Parser-Versionen={sorted(versions)})")
+    count = counts.pop()
+    missing = sorted(set(range(count)) - {m['shard'] for _, m in manifests})
+    if missing:
+        raise ValueError(f"Es fehlen {len(missing)} von {count} Shards: {missing}")
+    
+    print(f"🧩 Führe {count} Shards mit {sum(m['pdfs'] for _, m in manifests)} PDFs zusammen")
+    streams = [_iter_shard_records(folder) for folder, _ in manifests]
+    merged = heapq.merge(*streams, key=lambda record: record[0]['pdf_file'])
+    return write_streaming(merged, processed_dir, batch_size, sqlite)
+
+def _diff_records(name, left, right):
+    """Vergleicht zwei Listen von Datensätzen und beschreibt die Unterschiede"""
+    diffs = []
+    if len(left) != len(right):
+        diffs.append(f"{name}: {len(left)} vs. {len(right)} Einträge")
+    for i, (a, b) in enumerate(zip(left, right)):
+        for key in sorted(set(a) | set(b)):
+            if a.get(key) != b.get(key):
+                diffs.append(f"{name}[{i}].{key}: {a.get(key)!r} vs. {b.get(key)!r}")
+    return diffs
+
+def check_parity(raw_dir=RAW_DIR, reference=PDFPLUMBER, candidate=PDFIUM):
+    """Parst jedes PDF mit beiden Backends und vergleicht Spiel-, Spieler- und Ereignis-Datensätze.
+
+    Gibt ein Dict {pdf_file: [Unterschiede]} nur für abweichende PDFs zurück.
+    """
+    if candidate not in available_backends():
+        print(f"⚠ Backend '{candidate}' ist nicht installiert")
+        return None
+    
+    report = {}
+    pdf_files = list_pdf_files(raw_dir)
+    for pdf_file in pdf_files:
+        pdf_path = os.path.join(raw_dir, pdf_file)
+        ref_game, ref_players, ref_events = parse_pdf(pdf_path, pdf_file, reference)
+        cand_game, cand_players, cand_events = parse_pdf(pdf_path, pdf_file, candidate)
+        
+        diffs = (_diff_records("spiel", [ref_game], [cand_game]) +
+                 _diff_records("spieler", ref_players, cand_players) +
+                 _diff_records("ereignisse", ref_events, cand_events))
+        if diffs:
+            report[pdf_file] = diffs
+    
+    print(f"\n🔍 Parität {reference} ↔ {candidate}: "
+          f"{len(pdf_files) - len(report)}/{len(pdf_files)} PDFs identisch")
+    for pdf_file, diffs in report.items():
+        print(f"  ⚠ {pdf_file}: {len(diffs)} Abweichungen")
+        for diff in diffs[:5]:
+            print(f"     {diff}")
+    
+    return report
+
+def append_to_dataset(all_game_info, all_player_stats, all_events, processed_dir=PROCESSED_DIR):
+    """Hängt neu geparste Spiele an das partitionierte Dataset an (ohne Komplett-Rewrite)"""
+    if not all_game_info:
+        print(f"\n✅ Dataset aktuell, keine neuen Spielberichte")
+        return 0
+    df_games, df_players, df_events = build_dataframes(all_game_info, all_player_stats, all_events)
+    appended = storage.append_partitions(
+        {'games': df_games, 'players': df_players, 'events': df_events}, processed_dir
+    )
+    print(f"\n✅ {appended} neue Spiele an {storage.dataset_dir(processed_dir)} angehängt")
+    return appended
+
+def main(raw_dir=RAW_DIR, processed_dir=PROCESSED_DIR, jobs=1, use_cache=True, backend=DEFAULT_BACKEND,
+         from_text_cache=False, dataset=False, metrics_path=None, stream=True, batch_size=STREAM_BATCH_SIZE,
+         shard=None, shards_dir=None, sqlite=False, resume=False):
+    """Hauptverarbeitung: alle PDFs in raw_dir parsen und CSVs schreiben.
+
+    from_text_cache=True überspringt den Parse-Cache und führt nur die
+    Regex-Stufen auf den zwischengespeicherten Seitentexten neu aus.
+    dataset=True parst nur PDFs, die noch nicht im partitionierten Dataset
+    liegen, und hängt sie dort an, statt alle Tabellen neu zu schreiben.
+    metrics_path schreibt Zeiten und Zeilenzahlen pro PDF und Stufe als
+    JSON-Lines und gibt am Ende eine Zusammenfassung aus.
+    stream=True schreibt die Tabellen batchweise (siehe write_streaming)
+    mit begrenztem Speicherbedarf; stream=False sammelt wie bisher alles und
+    gibt die DataFrames zurück.
+    shard=(i, N) parst nur den Anteil dieses Shards und schreibt dessen
+    Datensätze nach shards_dir (Standard: processed_dir/shards), siehe
+    merge_shards.
+    sqlite=True schreibt die Tabellen zusätzlich in eine indizierte
+    SQLite-Datenbank (storage.SQLITE_FILE).
+    resume=True setzt einen abgebrochenen streamenden Lauf fort: die PDFs
+    der fertigen Batches im Journal werden nicht erneut geparst.
+    """
+    if dataset and not storage.HAS_PYARROW:
+        raise RuntimeError("Das partitionierte Dataset benötigt pyarrow")
+    cache = open_cache(backend=backend) if use_cache and not from_text_cache else None
+    text_cache = open_text_cache() if use_cache or from_text_cache else None
+    skip = storage.ingested_pdf_files(processed_dir) if dataset else None
+    if resume and stream and not dataset and shard is None:
+        skip = storage.journal_pdf_files(processed_dir)
+    metrics = ParseMetrics(metrics_path) if metrics_path else None
+    try:
+        if shard is not None:
+            results = iter_parse_results(raw_dir, jobs=jobs, cache=cache, backend=backend,
+                                         text_cache=text_cache, metrics=metrics, shard=shard)
+            output = write_shard(results, shards_dir or os.path.join(processed_dir, SHARDS_DIR), shard)
+        elif stream and not dataset:
+            results = iter_parse_results(raw_dir, jobs=jobs, cache=cache, backend=backend,
+                                         text_cache=text_cache, skip=skip, metrics=metrics)
+            output = write_streaming(results, processed_dir, batch_size, sqlite, resume)
+        else:
+            all_game_info, all_player_stats, all_events = parse_directory(raw_dir, jobs=jobs, cache=cache,
+                                                                          backend=backend, text_cache=text_cache,
+                                                                          skip=skip, metrics=metrics)
+            if dataset:
+                output = append_to_dataset(all_game_info, all_player_stats, all_events, processed_dir)
+            else:
+                output = write_outputs(all_game_info, all_player_stats, all_events, processed_dir, sqlite)
+    finally:
+        if metrics is not None:
+            metrics.close()
+    if metrics is not None:
+        metrics.print_summary()
+    return output
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Spielbericht-PDFs in CSVs umwandeln")
+    parser.add_argument("--raw-dir", default=RAW_DIR, help="Ordner mit den PDFs")
+    parser.add_argument("--processed-dir", default=PROCESSED_DIR, help="Zielordner für die CSVs")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Anzahl paralleler Prozesse (1 = seriell)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Parse-Cache ignorieren und alle PDFs neu parsen")
+    parser.add_argument("--backend", choices=BACKENDS, default=DEFAULT_BACKEND,
+                        help="Textextraktion: pdfplumber (Referenz) oder pdfium (schnell)")
+    parser.add_argument("--check-parity", action="store_true",
+                        help="pdfplumber und pdfium pro PDF vergleichen statt CSVs zu schreiben")
+    parser.add_argument("--from-text-cache", action="store_true",
+                        help="Nur die Regex-Stufen auf den gecachten Seitentexten neu ausführen")
+    parser.add_argument("--dataset", action="store_true",
+                        help="Neue Spiele an das nach Liga/Saison/Spieltag partitionierte Dataset anhängen")
+    parser.add_argument("--compact", action="store_true",
+                        help="Kleine Teil-Dateien je Partition des Datasets zusammenfassen")
+    parser.add_argument("--metrics", metavar="PFAD",
+                        help="Zeiten und Zeilenzahlen pro PDF und Stufe als JSON-Lines schreiben")
+    parser.add_argument("--no-stream", action="store_true",
+                        help="Alle Datensätze sammeln und erst am Ende schreiben (hoher Speicherbedarf)")
+    parser.add_argument("--batch-size", type=int, default=STREAM_BATCH_SIZE,
+                        help="PDFs pro geschriebenem Batch")
+    parser.add_argument("--resume", action="store_true",
+                        help="Abgebrochenen Lauf fortsetzen (fertige Batches aus dem Journal übernehmen)")
+    parser.add_argument("--shard", type=parse_shard_spec, metavar="i/N",
+                        help="Nur Shard i von N parsen (stabiler Hash des Dateinamens) und Datensätze ablegen")
+    parser.add_argument("--merge-shards", action="store_true",
+                        help="Alle Shards zu den drei Tabellen zusammenführen")
+    parser.add_argument("--sqlite", action="store_true",
+                        help="Tabellen zusätzlich in eine indizierte SQLite-Datenbank schreiben")
+    parser.add_argument("--audit", action="store_true",
+                        help="Nach dem Lauf Endstand, Halbzeit, Spielertore und Spielstände prüfen (audit.json)")
+    parser.add_argument("--shards-dir", help="Ordner der Shards (Standard: <processed-dir>/shards)")
+    args = parser.parse_args()
+    
+    if args.check_parity:
+        check_parity(args.raw_dir)
+    elif args.merge_shards:
+        merge_shards(args.shards_dir or os.path.join(args.processed_dir, SHARDS_DIR), args.processed_dir,
+                     args.batch_size, sqlite=args.sqlite)
+    else:
+        # --compact allein fasst nur zusammen, ohne neu zu parsen
+        if args.dataset or not args.compact:
+            main(args.raw_dir, args.processed_dir, jobs=args.jobs, use_cache=not args.no_cache,
+                 backend=args.backend, from_text_cache=args.from_text_cache, dataset=args.dataset,
+                 metrics_path=args.metrics, stream=not args.no_stream, batch_size=args.batch_size,
+                 shard=args.shard, shards_dir=args.shards_dir, sqlite=args.sqlite, resume=args.resume)
+        if args.compact:
+            print(f"🗜️  {storage.compact_partitions(args.processed_dir)} Partitionen kompaktiert")
+    
+    if args.audit and not args.check_parity and not args.shard and not args.dataset:
+        report = audit.audit(*audit.load_tables(args.processed_dir))
+        audit.print_report(report)
+        audit.write_report(report, os.path.join(args.processed_dir, "audit.json"))
@@ -0,0 +1,157 @@
+import os
+import time
+import queue
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+import scraper
+import pdf_parser
+
+# Maximale Anzahl heruntergeladener, noch nicht geparster PDFs
+QUEUE_SIZE = 16
+
+# Markiert das Ende des Download-Stroms
+_DONE = object()
+
+
+def _download_stage(urls, raw_dir, pdf_queue, workers, rate_limit, retries, incremental, stats):
+    """Lädt die PDFs aller Seiten und legt jede fertige Datei sofort in die Queue"""
+    session = scraper.create_session(pool_size=max(workers, 1))
+    limiter = scraper.HostRateLimiter(rate_limit)
+
+    try:
+        for url in urls:
+            # Mehrere Ligen wie beim Crawler in eigene Unterordner
+            folder = raw_dir if len(urls) == 1 else os.path.join(raw_dir, scraper.league_folder_from_url(url))
+            os.makedirs(folder, exist_ok=True)
+            manifest = scraper.DownloadManifest(folder) if incremental else None
+
+            try:
+                links = scraper.fetch_pdf_links(url, session=session)
+            except requests.RequestException as e:
+                print(f"⚠ Seite fehlgeschlagen: {url}: {e}")
+                continue
+            print(f"Gefundene PDF-Links ({url}): {len(links)}")
+
+            with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+                futures = [
+                    executor.submit(scraper._download_one, session, link, folder, limiter,
+                                    retries, scraper.DEFAULT_BACKOFF, manifest)
+                    for link in links
+                ]
+                for future in as_completed(futures):
+                    try:
+                        file_name, _, status = future.result()
+                    except requests.RequestException as e:
+                        stats['download_fehler'] += 1
+                        print(f"⚠ Download fehlgeschlagen: {e}")
+                        continue
+                    stats[status] += 1
+                    if status == 'duplikat':
+                        continue
+                    # Blockiert, wenn der Parser hinterherhinkt (Backpressure)
+                    pdf_queue.put((os.path.join(folder, file_name), time.perf_counter()))
+
+            if manifest is not None:
+                manifest.save()
+    finally:
+        session.close()
+        pdf_queue.put(_DONE)
+
+
+def run_pipeline(urls, raw_dir=scraper.DOWNLOAD_DIR, processed_dir=pdf_parser.PROCESSED_DIR,
+                 workers=scraper.DEFAULT_WORKERS, rate_limit=scraper.DEFAULT_RATE_LIMIT,
+                 retries=scraper.DEFAULT_RETRIES, queue_size=QUEUE_SIZE, incremental=True,
+                 on_parsed=None, backend=pdf_parser.DEFAULT_BACKEND):
+    """Lädt und parst Spielberichte überlappend statt in zwei Batch-Phasen.
+
+    Die Downloads laufen in einem Hintergrund-Thread und übergeben jede fertige
+    Datei über eine begrenzte Queue an den Parser. on_parsed(game_info, players,
+    events) wird für jedes geparste PDF sofort aufgerufen. Am Ende werden die
+    CSVs wie bei pdf_parser.main geschrieben.
+    """
+    pdf_queue = queue.Queue(maxsize=max(queue_size, 1))
+    stats = {'neu': 0, 'unveraendert': 0, 'duplikat': 0, 'download_fehler': 0, 'parse_fehler': 0}
+    start = time.perf_counter()
+
+    producer = threading.Thread(
+        target=_download_stage,
+        args=(urls, raw_dir, pdf_queue, workers, rate_limit, retries, incremental, stats),
+        daemon=True
+    )
+    producer.start()
+
+    cache = pdf_parser.open_cache(backend=backend)
+    text_cache = pdf_parser.open_text_cache()
+    results = []
+    latencies = []
+    first_result = None
+
+    while True:
+        item = pdf_queue.get()
+        if item is _DONE:
+            break
+        pdf_path, downloaded_at = item
+        pdf_file = os.path.relpath(pdf_path, raw_dir)
+        try:
+            game_info, players, events = pdf_parser.parse_pdf_cached(pdf_path, pdf_file, cache, backend, text_cache)
+        except Exception as e:
+            stats['parse_fehler'] += 1
+            print(f"  ⚠ Fehler beim Parsen von {pdf_file}: {e}")
+            continue
+
+        now = time.perf_counter()
+        latencies.append(now - downloaded_at)
+        if first_result is None:
+            first_result = now - start
+        results.append((pdf_file, game_info, players, events))
+        if on_parsed is not None:
+            on_parsed(game_info, players, events)
+
+    producer.join()
+
+    if not results:
+        print("⚠ Keine Spielberichte verarbeitet")
+        return None
+
+    # Deterministische Reihenfolge unabhängig von der Download-Reihenfolge
+    results.sort(key=lambda r: r[0])
+    all_game_info = [r[1] for r in results]
+    all_player_stats = [p for r in results for p in r[2]]
+    all_events = [e for r in results for e in r[3]]
+    output = pdf_parser.write_outputs(all_game_info, all_player_stats, all_events, processed_dir)
+
+    elapsed = time.perf_counter() - start
+    print(f"\n⚡ Pipeline: {len(results)} Berichte in {elapsed:.1f} s "
+          f"(erstes Ergebnis nach {first_result:.2f} s, "
+          f"Ø {sum(latencies) / len(latencies):.2f} s Download→Parse)")
+    print(f"   {stats['neu']} neu, {stats['unveraendert']} unverändert, {stats['duplikat']} Duplikate, "
+          f"{stats['download_fehler']} Download-Fehler, {stats['parse_fehler']} Parse-Fehler")
+
+    return output
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Spielberichte laden und direkt parsen")
+    parser.add_argument("--url", action="append", help="Liga-/Gruppenseite (mehrfach möglich)")
+    parser.add_argument("--urls-file", help="Textdatei mit einer Liga-URL pro Zeile")
+    parser.add_argument("--workers", type=int, default=scraper.DEFAULT_WORKERS, help="Parallele Downloads")
+    parser.add_argument("--rate-limit", type=float, default=scraper.DEFAULT_RATE_LIMIT,
+                        help="Max. Requests pro Sekunde und Host (0 = unbegrenzt)")
+    parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE,
+                        help="Max. Anzahl geladener, noch nicht geparster PDFs")
+    parser.add_argument("--full", action="store_true", help="Manifest ignorieren und alle PDFs neu laden")
+    parser.add_argument("--backend", choices=pdf_parser.BACKENDS, default=pdf_parser.DEFAULT_BACKEND,
+                        help="Textextraktion: pdfplumber oder pdfium")
+    args = parser.parse_args()
+
+    urls = list(args.url or [])
+    if args.urls_file:
+        urls.extend(scraper.read_url_list(args.urls_file))
+
+    run_pipeline(urls or [scraper.START_URL], workers=args.workers,
+                 rate_limit=args.rate_limit or None, queue_size=args.queue_size,
+                 incremental=not args.full, backend=args.backend)
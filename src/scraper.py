@@ -1,9 +1,17 @@
 import os
+import json
+import asyncio
+import time
+import hashlib
+import threading
+import argparse
 import requests
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import urlparse, parse_qs
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
+from requests.adapters import HTTPAdapter
 
 # URL der Liga-Seite
 BASE_URL = "https://hvnb-handball.liga.nu"
@@ -14,40 +22,471 @@ START_URL = (
 
 # Zielordner für PDFs
 DOWNLOAD_DIR = "../data/raw"
+MANIFEST_FILE = "manifest.json"
 
-def fetch_pdf_links(url):
-    """Lädt die Liga-Seite und extrahiert alle PDF-Links."""
-    response = requests.get(url)
-    response.raise_for_status()
-    
-    soup = BeautifulSoup(response.text, "html.parser")
+# Download-Einstellungen
+DEFAULT_WORKERS = 4
+DEFAULT_RATE_LIMIT = 5.0   # Requests pro Sekunde und Host (None = unbegrenzt)
+DEFAULT_CONCURRENCY = 8    # Gleichzeitige Requests beim Multi-Liga-Crawl
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5      # Sekunden, verdoppelt sich pro Versuch
+REQUEST_TIMEOUT = 30
+CHUNK_SIZE = 64 * 1024     # Bytes pro Block beim Streamen
+RETRY_STATUS = {429, 500, 502, 503, 504}
+MAX_RETRY_AFTER = 60       # Obergrenze (Sekunden) für Retry-After des Servers
+
+
+class HostRateLimiter:
+    """Begrenzt die Anzahl Requests pro Sekunde getrennt für jeden Host"""
+
+    def __init__(self, rate=None):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        """Blockiert, bis für den Host der URL der nächste Request erlaubt ist"""
+        if not self.interval:
+            return
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+def create_session(pool_size=DEFAULT_WORKERS):
+    """Erstellt eine Session mit Connection-Pool für wiederverwendete Verbindungen"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def retry_after_seconds(response):
+    """Wartezeit aus dem Retry-After-Header (Sekunden oder HTTP-Datum), sonst None"""
+    value = response.headers.get('Retry-After') if response is not None else None
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        from email.utils import parsedate_to_datetime
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+def get_with_retry(session, url, limiter=None, retries=DEFAULT_RETRIES,
+                   backoff=DEFAULT_BACKOFF, **kwargs):
+    """GET-Request mit Rate-Limit und exponentiellem Backoff bei Fehlern.
+
+    Schickt der Server bei 429/503 ein Retry-After, wird mindestens so lange
+    gewartet (höchstens MAX_RETRY_AFTER Sekunden).
+    """
+    kwargs.setdefault("timeout", REQUEST_TIMEOUT)
+    for attempt in range(retries + 1):
+        if limiter is not None:
+            limiter.wait(url)
+        try:
+            response = session.get(url, **kwargs)
+            if response.status_code in RETRY_STATUS and attempt < retries:
+                response.close()
+                raise requests.HTTPError(f"HTTP {response.status_code}", response=response)
+            response.raise_for_status()
+            return response
+        except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+            _retry_wait(e, attempt, retries, backoff)
+
+
+def _retry_wait(error, attempt, retries, backoff):
+    """Wartet vor dem nächsten Versuch oder wirft den Fehler, wenn er endgültig ist"""
+    response = getattr(error, 'response', None)
+    status = response.status_code if response is not None else None
+    if attempt >= retries or (status is not None and status not in RETRY_STATUS):
+        raise error
+    time.sleep(max(backoff * (2 ** attempt), retry_after_seconds(response) or 0))
+
+
+def fetch_pdf_links(url, session=None, limiter=None, retries=DEFAULT_RETRIES,
+                    backoff=DEFAULT_BACKOFF):
+    """Lädt die Liga-Seite (mit Rate-Limit und Retries) und extrahiert alle PDF-Links."""
+    with get_with_retry(session or requests, url, limiter, retries, backoff) as response:
+        soup = BeautifulSoup(response.text, "html.parser")
     pdf_links = []
-    
+
     # Finde alle <a> Tags mit class="picto-pdf"
     for a_tag in soup.find_all("a", class_="picto-pdf"):
         relative_link = a_tag.get("href")
         full_link = urljoin(BASE_URL, relative_link)
         pdf_links.append(full_link)
-    
+
     return pdf_links
 
 
-def download_pdfs(links, folder=DOWNLOAD_DIR):
-    """Lädt alle PDFs aus der Liste herunter."""
+class DownloadManifest:
+    """Persistentes Verzeichnis aller geladenen PDFs (URL, Meeting-ID, ETag, Größe, SHA-256).
+
+    Dient für bedingte Requests (If-None-Match / If-Modified-Since) und zum
+    Erkennen identischer Spielberichte unter verschiedenen URLs.
+    """
+
+    def __init__(self, folder=DOWNLOAD_DIR, file_name=MANIFEST_FILE):
+        self.folder = folder
+        self.path = os.path.join(folder, file_name)
+        self.entries = {}
+        self._lock = threading.Lock()
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                self.entries = json.load(f).get("entries", {})
+        self._by_hash = {e['sha256']: e['file'] for e in self.entries.values()
+                         if e.get('sha256') and not e.get('duplikat_von')}
+
+    def conditional_headers(self, url):
+        """Header für einen bedingten Request, falls die Datei bereits vorliegt"""
+        entry = self.entries.get(url)
+        if not entry or not os.path.exists(os.path.join(self.folder, entry['file'])):
+            return {}
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def register(self, url, file_name, response, sha256, size, part_path):
+        """Trägt einen Download ein und gibt 'neu', 'unveraendert' oder 'duplikat' zurück.
+
+        part_path ist der fertige Download. Bei 'neu' wird er noch unter dem
+        Lock an seinen Platz umbenannt, damit ein gleichzeitiger Download
+        mit identischem Inhalt die Datei schon sieht und als 'duplikat'
+        gilt. Sonst bleibt er liegen und der Aufrufer löscht ihn.
+        """
+        with self._lock:
+            existing = self._by_hash.get(sha256)
+            if existing and not os.path.exists(os.path.join(self.folder, existing)):
+                existing = None
+
+            if existing == file_name:
+                status = 'unveraendert'
+            elif existing:
+                status = 'duplikat'
+            else:
+                status = 'neu'
+                os.replace(part_path, os.path.join(self.folder, file_name))
+                # Die Datei hat jetzt neuen Inhalt: der alte Hash darf nicht mehr auf sie zeigen
+                old = self.entries.get(url)
+                if old and not old.get('duplikat_von') and self._by_hash.get(old.get('sha256')) == file_name:
+                    del self._by_hash[old['sha256']]
+                self._by_hash[sha256] = file_name
+
+            self.entries[url] = {
+                'url': url,
+                'meeting_id': os.path.splitext(file_name)[0],
+                'file': existing or file_name,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'size': size,
+                'sha256': sha256,
+                'duplikat_von': existing if status == 'duplikat' else None,
+            }
+            return status
+
+    def save(self):
+        """Schreibt das Manifest atomar auf die Platte"""
+        os.makedirs(self.folder, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with self._lock:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({'version': 1, 'entries': self.entries}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+
+
+def _read_part_meta(meta_path):
+    """Liest ETag/Last-Modified eines angefangenen Downloads (für If-Range)"""
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _stream_to_part(response, part_path, mode, hasher):
+    """Schreibt den Response-Body blockweise in die .part-Datei, gibt die geschriebenen Bytes zurück"""
+    written = 0
+    with open(part_path, mode) as f:
+        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+            if chunk:
+                f.write(chunk)
+                hasher.update(chunk)
+                written += len(chunk)
+    return written
+
+
+def _content_range(response):
+    """(Start, Gesamtgröße) aus dem Content-Range-Header, Gesamtgröße None bei '*'"""
+    match = re.match(r'bytes\s+(\d+)-\d+/(\d+|\*)', response.headers.get('Content-Range', ''))
+    if not match:
+        return None, None
+    total = match.group(2)
+    return int(match.group(1)), None if total == '*' else int(total)
+
+
+def _discard_part(part_path, meta_path):
+    """Löscht einen angefangenen Download samt ETag/Last-Modified"""
+    for path in (part_path, meta_path):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _download_one(session, link, folder, limiter, retries, backoff, manifest=None):
+    """Lädt ein einzelnes PDF und gibt (Dateiname, übertragene Bytes, Status) zurück.
+
+    Status ist 'neu', 'unveraendert' (HTTP 304) oder 'duplikat'.
+    Der Body wird blockweise in '<datei>.part' gestreamt und erst nach
+    vollständigem Download atomar umbenannt. Abgebrochene Downloads werden
+    beim nächsten Versuch per HTTP-Range fortgesetzt. Passt die Antwort
+    nicht zur .part-Datei (416, anderer Content-Range-Start), beginnt der
+    Download von vorne. Alle Fehlversuche teilen sich ein Budget von
+    retries Wiederholungen.
+    """
+    file_name = safe_filename_from_url(link)
+    file_path = os.path.join(folder, file_name)
+    part_path = file_path + ".part"
+    meta_path = part_path + ".json"
+    transferred = 0
+    attempt = 0
+
+    while True:
+        headers = {}
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        if offset:
+            headers['Range'] = f"bytes={offset}-"
+            validator = _read_part_meta(meta_path)
+            if validator.get('etag') or validator.get('last_modified'):
+                headers['If-Range'] = validator.get('etag') or validator['last_modified']
+        elif manifest is not None:
+            headers = manifest.conditional_headers(link)
+
+        try:
+            response = get_with_retry(session, link, limiter, retries=0,
+                                      headers=headers, stream=True)
+        except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+            if e.response is not None and e.response.status_code == 416 and offset:
+                # Range passt nicht (mehr) zur Datei: von vorne beginnen
+                _discard_part(part_path, meta_path)
+                continue
+            _retry_wait(e, attempt, retries, backoff)
+            attempt += 1
+            continue
+
+        with response:
+            if response.status_code == 304:
+                return file_name, transferred, 'unveraendert'
+
+            hasher = hashlib.sha256()
+            if response.status_code == 206:
+                start, expected = _content_range(response)
+                if not offset or start != offset:
+                    # Anderer Bereich als angefragt: nicht anhängen, sondern neu laden
+                    _discard_part(part_path, meta_path)
+                    if offset:
+                        continue
+                    _retry_wait(requests.ConnectionError(f"Unerwarteter Content-Range: {file_name}"),
+                                attempt, retries, backoff)
+                    attempt += 1
+                    continue
+                with open(part_path, "rb") as f:
+                    for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                        hasher.update(chunk)
+                mode = "ab"
+            else:
+                expected = None
+                if response.headers.get('Content-Length') and 'Content-Encoding' not in response.headers:
+                    expected = int(response.headers['Content-Length'])
+                mode = "wb"
+                with open(meta_path, "w", encoding="utf-8") as f:
+                    json.dump({'etag': response.headers.get('ETag'),
+                               'last_modified': response.headers.get('Last-Modified')}, f)
+
+            try:
+                transferred += _stream_to_part(response, part_path, mode, hasher)
+                size = os.path.getsize(part_path)
+                if expected is not None and size != expected:
+                    if size > expected:
+                        # Mehr Bytes als angekündigt: .part ist unbrauchbar
+                        _discard_part(part_path, meta_path)
+                    raise requests.ConnectionError(f"Unvollständiger Download: {file_name}")
+            except (requests.ConnectionError, requests.exceptions.ChunkedEncodingError) as e:
+                # Abgebrochen: .part bleibt (falls gültig) liegen, nächster Versuch setzt per Range fort
+                _retry_wait(e, attempt, retries, backoff)
+                attempt += 1
+                continue
+            break
+
+    if manifest is None:
+        status = 'neu'
+        os.replace(part_path, file_path)
+    else:
+        status = manifest.register(link, file_name, response, hasher.hexdigest(), size, part_path)
+        if status != 'neu':
+            os.remove(part_path)
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+    return file_name, transferred, status
+
+
+def download_pdfs(links, folder=DOWNLOAD_DIR, workers=DEFAULT_WORKERS,
+                  rate_limit=DEFAULT_RATE_LIMIT, retries=DEFAULT_RETRIES,
+                  backoff=DEFAULT_BACKOFF, session=None, incremental=True):
+    """Lädt alle PDFs aus der Liste parallel über eine gemeinsame Session herunter.
+
+    Mit incremental=True werden bereits bekannte Dateien über das Manifest nur
+    bedingt angefragt und identische Berichte nicht doppelt gespeichert.
+    Gibt ein Dict mit Durchsatz-Kennzahlen zurück (Dateien, Bytes, Dateien/s, MB/s).
+    """
     os.makedirs(folder, exist_ok=True)
-    
-    for link in links:
-        file_name = safe_filename_from_url(link)
-        file_path = os.path.join(folder, file_name)
-        
-        print(f"Lade herunter: {file_name}")
-        response = requests.get(link)
-        response.raise_for_status()
-        
-        with open(file_path, "wb") as f:
-            f.write(response.content)
-    
-    print(f"\n✅ {len(links)} PDFs wurden in '{folder}' gespeichert.")
+    own_session = session is None
+    session = session or create_session(pool_size=max(workers, 1))
+    limiter = HostRateLimiter(rate_limit)
+    manifest = DownloadManifest(folder) if incremental else None
+
+    total_bytes = 0
+    failed = []
+    status_counts = {'neu': 0, 'unveraendert': 0, 'duplikat': 0}
+    start = time.perf_counter()
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+            futures = {
+                executor.submit(_download_one, session, link, folder, limiter,
+                                retries, backoff, manifest): link
+                for link in links
+            }
+            for future in as_completed(futures):
+                link = futures[future]
+                try:
+                    file_name, size, status = future.result()
+                    total_bytes += size
+                    status_counts[status] += 1
+                    if status == 'neu':
+                        print(f"Heruntergeladen: {file_name} ({size / 1024:.1f} KB)")
+                    elif status == 'duplikat':
+                        print(f"Duplikat übersprungen: {file_name}")
+                except requests.RequestException as e:
+                    failed.append(link)
+                    print(f"⚠ Fehler bei {link}: {e}")
+    finally:
+        if manifest is not None:
+            manifest.save()
+        if own_session:
+            session.close()
+
+    elapsed = time.perf_counter() - start
+    files = len(links) - len(failed)
+    stats = {
+        'dateien': files,
+        'fehler': len(failed),
+        'neu': status_counts['neu'],
+        'unveraendert': status_counts['unveraendert'],
+        'duplikate': status_counts['duplikat'],
+        'bytes': total_bytes,
+        'sekunden': round(elapsed, 3),
+        'dateien_pro_s': round(files / elapsed, 2) if elapsed > 0 else 0,
+        'mb_pro_s': round(total_bytes / 1024 / 1024 / elapsed, 2) if elapsed > 0 else 0,
+    }
+
+    print(f"\n✅ {files} PDFs wurden in '{folder}' gespeichert "
+          f"({stats['neu']} neu, {stats['unveraendert']} unverändert, {stats['duplikate']} Duplikate).")
+    print(f"⚡ {stats['dateien_pro_s']} Dateien/s | {stats['mb_pro_s']} MB/s ({stats['sekunden']} s)")
+    if failed:
+        print(f"⚠ {len(failed)} Downloads fehlgeschlagen")
+
+    return stats
+
+
+async def crawl_leagues(urls, folder=DOWNLOAD_DIR, concurrency=DEFAULT_CONCURRENCY,
+                        rate_limit=DEFAULT_RATE_LIMIT, retries=DEFAULT_RETRIES,
+                        backoff=DEFAULT_BACKOFF, incremental=True):
+    """Crawlt mehrere Meisterschafts-/Gruppenseiten nebenläufig.
+
+    Seiten und PDFs werden über eine gemeinsame Session und denselben
+    Rate-Limiter geladen, die Anzahl gleichzeitiger Requests begrenzt ein
+    Semaphore. Die blockierenden Requests laufen in einem eigenen Thread-Pool
+    mit concurrency Threads (der Standard-Pool von asyncio ist kleiner
+    und würde die Nebenläufigkeit still begrenzen). Jede Gruppe landet in
+    einem eigenen Unterordner (siehe league_folder_from_url).
+    Gibt pro Seiten-URL ein Dict mit Ordner und Download-Zählern zurück.
+    """
+    session = create_session(pool_size=max(concurrency, 1))
+    limiter = HostRateLimiter(rate_limit)
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+    executor = ThreadPoolExecutor(max_workers=max(concurrency, 1))
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+
+    async def fetch_page(url):
+        async with semaphore:
+            return await loop.run_in_executor(executor, fetch_pdf_links, url, session,
+                                              limiter, retries, backoff)
+
+    async def fetch_pdf(link, league_folder, manifest):
+        async with semaphore:
+            return await loop.run_in_executor(executor, _download_one, session, link,
+                                              league_folder, limiter, retries, backoff, manifest)
+
+    async def crawl_group(url):
+        league_folder = os.path.join(folder, league_folder_from_url(url))
+        links = await fetch_page(url)
+        os.makedirs(league_folder, exist_ok=True)
+        manifest = DownloadManifest(league_folder) if incremental else None
+
+        results = await asyncio.gather(
+            *(fetch_pdf(link, league_folder, manifest) for link in links),
+            return_exceptions=True
+        )
+        if manifest is not None:
+            manifest.save()
+
+        summary = {'ordner': league_folder, 'links': len(links), 'fehler': 0,
+                   'neu': 0, 'unveraendert': 0, 'duplikat': 0, 'bytes': 0}
+        for result in results:
+            if isinstance(result, Exception):
+                summary['fehler'] += 1
+                continue
+            _, size, status = result
+            summary[status] += 1
+            summary['bytes'] += size
+        print(f"✓ {os.path.basename(league_folder)}: {summary['links']} PDFs "
+              f"({summary['neu']} neu, {summary['unveraendert']} unverändert, {summary['fehler']} Fehler)")
+        return summary
+
+    try:
+        results = await asyncio.gather(*(crawl_group(url) for url in urls), return_exceptions=True)
+    finally:
+        executor.shutdown(wait=False)
+        session.close()
+
+    report = {}
+    for url, result in zip(urls, results):
+        if isinstance(result, Exception):
+            print(f"⚠ Seite fehlgeschlagen: {url}: {result}")
+            report[url] = {'fehler': str(result)}
+        else:
+            report[url] = result
+
+    elapsed = time.perf_counter() - start
+    total = sum(r.get('links', 0) for r in report.values())
+    print(f"\n✅ {len(urls)} Seiten, {total} PDFs in {elapsed:.1f} s")
+    return report
+
 
 def safe_filename_from_url(url):
     """Erzeugt einen sicheren Dateinamen aus der URL."""
@@ -67,8 +506,50 @@ def safe_filename_from_url(url):
     name = re.sub(r'[^a-zA-Z0-9_-]', '_', name)
     return name + ".pdf"
 
+def league_folder_from_url(url):
+    """Erzeugt einen Ordnernamen aus Meisterschaft und Gruppe einer Liga-Seite."""
+    query = parse_qs(urlparse(url).query)
+    parts = [query.get('championship', [''])[0], query.get('group', [''])[0]]
+    name = "_".join(p for p in parts if p) or "liga"
+    return re.sub(r'[^a-zA-Z0-9_-]+', '_', name).strip('_')
+
+def read_url_list(path):
+    """Liest Liga-URLs aus einer Textdatei (eine pro Zeile, # = Kommentar)."""
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
 if __name__ == "__main__":
-    pdf_links = fetch_pdf_links(START_URL)
-    print(f"Gefundene PDF-Links: {len(pdf_links)}")
-    
-    download_pdfs(pdf_links)
+    parser = argparse.ArgumentParser(description="Spielbericht-PDFs von nuLiga herunterladen")
+    parser.add_argument("--url", action="append", help="Liga-/Gruppenseite (mehrfach möglich)")
+    parser.add_argument("--urls-file", help="Textdatei mit einer Liga-URL pro Zeile")
+    parser.add_argument("--folder", default=DOWNLOAD_DIR, help="Zielordner")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Parallele Downloads")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="Gleichzeitige Requests beim Crawlen mehrerer Ligen")
+    parser.add_argument("--rate-limit", type=float, default=DEFAULT_RATE_LIMIT,
+                        help="Max. Requests pro Sekunde und Host (0 = unbegrenzt)")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES, help="Wiederholungen bei Fehlern")
+    parser.add_argument("--full", action="store_true",
+                        help="Manifest ignorieren und alle PDFs neu laden")
+    args = parser.parse_args()
+
+    urls = list(args.url or [])
+    if args.urls_file:
+        urls.extend(read_url_list(args.urls_file))
+
+    if len(urls) > 1:
+        # Mehrere Ligen: asynchroner Crawl mit Unterordner pro Liga
+        asyncio.run(crawl_leagues(urls, folder=args.folder, concurrency=args.concurrency,
+                                  rate_limit=args.rate_limit or None, retries=args.retries,
+                                  incremental=not args.full))
+    else:
+        session = create_session(pool_size=max(args.workers, 1))
+        pdf_links = fetch_pdf_links(urls[0] if urls else START_URL, session=session,
+                                    limiter=HostRateLimiter(args.rate_limit or None),
+                                    retries=args.retries)
+        print(f"Gefundene PDF-Links: {len(pdf_links)}")
+
+        download_pdfs(pdf_links, folder=args.folder, workers=args.workers,
+                      rate_limit=args.rate_limit or None, retries=args.retries,
+                      session=session, incremental=not args.full)
+        session.close()
@@ -0,0 +1,738 @@
+import os
+import json
+import shutil
+import sqlite3
+from contextlib import closing
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (nur Verfügbarkeit prüfen)
+    HAS_PYARROW = True
+except ImportError:  # optional: ohne pyarrow bleibt es bei CSV
+    HAS_PYARROW = False
+
+# Dateinamen (ohne Endung) der drei verarbeiteten Tabellen
+TABLES = {
+    'games': "spiele",
+    'players': "spieler_statistiken",
+    'events': "spielereignisse",
+}
+
+# Spalten, die als Kategorie gespeichert werden (wenige, oft wiederholte Werte)
+CATEGORY_COLUMNS = {
+    'games': ['heimmannschaft', 'gastmannschaft'],
+    'players': ['team'],
+    'events': ['team', 'ereignis'],
+}
+
+# Ganzzahlige Spalten (nullable, da z.B. Auszeiten keinen Spielstand haben)
+INT_COLUMNS = {
+    'games': ['spielnummer', 'endstand_heim', 'endstand_gast', 'halbzeit_heim', 'halbzeit_gast'],
+    'players': ['spielnummer', 'trikotnummer', 'tore', 'siebenmeter_tore', 'siebenmeter_versuche',
+                'gelbe_karten', 'zweiminuten_strafen'],
+    'events': ['spielnummer', 'trikotnummer', 'stand_heim', 'stand_gast'],
+}
+
+
+def data_version(processed_dir, *extra):
+    """Versionskennung der Daten im Verarbeitungsordner (aus Pfad, Größe und mtime aller Tabellendateien).
+
+    Ändert sich eine Tabelle (neuer Parser-Lauf, angehängte Partition), ändert
+    sich auch die Kennung. extra fließt mit ein (z.B. Filter).
+    """
+    import hashlib
+
+    stats = []
+    for root, _, files in os.walk(processed_dir):
+        for name in sorted(files):
+            if name.endswith((".csv", ".parquet", f".{ARROW_EXTENSION}", ".sqlite")):
+                path = os.path.join(root, name)
+                st = os.stat(path)
+                stats.append((os.path.relpath(path, processed_dir), st.st_size, st.st_mtime_ns))
+    stats.sort()
+    return hashlib.sha1(repr((os.path.abspath(processed_dir), stats, extra)).encode("utf-8")).hexdigest()[:16]
+
+
+def table_path(processed_dir, table, extension):
+    """Pfad einer Tabelle im Verarbeitungsordner, z.B. ('games', 'parquet')"""
+    return os.path.join(processed_dir, f"{TABLES[table]}.{extension}")
+
+
+def to_typed(df, table):
+    """Wandelt eine Tabelle in die typisierte Speicherform um.
+
+    Ganzzahlen werden Int64, Teams/Ereignisse Kategorien und 'datum' ein
+    echtes Datum.
+    """
+    df = df.copy()
+    for col in INT_COLUMNS[table]:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype('Int64')
+    for col in CATEGORY_COLUMNS[table]:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    if table == 'games' and 'datum' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['datum']):
+        df['datum'] = pd.to_datetime(df['datum'], format='%d.%m.%Y', errors='coerce')
+    if table == 'players' and 'disqualifikation' in df.columns:
+        df['disqualifikation'] = df['disqualifikation'].astype(bool)
+    return df
+
+
+def from_typed(df):
+    """Passt typisierte Ganzzahlspalten an die CSV-Semantik der Analysen an.
+
+    Vollständige Spalten werden int64, Spalten mit Lücken float64 mit NaN
+    (wie bei pd.read_csv). Kategorien und Datum bleiben erhalten.
+    """
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.Int64Dtype):
+            df[col] = df[col].astype('float64') if df[col].isna().any() else df[col].astype('int64')
+    return df
+
+
+def save_parquet(tables, processed_dir):
+    """Speichert {'games': df, 'players': df, 'events': df} als typisiertes Parquet.
+
+    Gibt die geschriebenen Pfade zurück (leer, wenn pyarrow fehlt).
+    """
+    if not HAS_PYARROW:
+        return []
+    os.makedirs(processed_dir, exist_ok=True)
+    paths = []
+    for table, df in tables.items():
+        path = table_path(processed_dir, table, "parquet")
+        to_typed(df, table).to_parquet(path, index=False, compression='zstd')
+        paths.append(path)
+    return paths
+
+
+def has_parquet(processed_dir):
+    """True, wenn alle drei Tabellen als Parquet vorliegen"""
+    return HAS_PYARROW and all(os.path.exists(table_path(processed_dir, table, "parquet"))
+                               for table in TABLES)
+
+
+def load_parquet(processed_dir):
+    """Lädt alle drei Tabellen aus Parquet als Dict von DataFrames"""
+    return {table: from_typed(pd.read_parquet(table_path(processed_dir, table, "parquet")))
+            for table in TABLES}
+
+
+# Arrow-IPC (Feather v2), unkomprimiert: wird per mmap gelesen und von allen Prozessen geteilt
+ARROW_EXTENSION = "arrow"
+
+
+def _arrow_schema(table, schema, dictionaries=True):
+    """Festes Schema unabhängig vom Inhalt des ersten Batches.
+
+    Ganzzahlen werden int64, Kategorien Dictionary-Spalten (dictionaries=True,
+    Parquet) bzw. einfache Strings (Arrow-IPC: Dictionaries dürfen sich im
+    Dateiformat zwischen Batches nicht ändern, Strings lassen sich zudem
+    ohne Kopie als pandas-Spalte verwenden).
+    """
+    import pyarrow as pa
+
+    fields = []
+    for field in schema:
+        if field.name in INT_COLUMNS[table]:
+            field = field.with_type(pa.int64())
+        elif field.name in CATEGORY_COLUMNS[table]:
+            field = field.with_type(pa.dictionary(pa.int32(), pa.string()) if dictionaries else pa.string())
+        elif pa.types.is_null(field.type) or pa.types.is_large_string(field.type):
+            field = field.with_type(pa.string())
+        fields.append(field)
+    return pa.schema(fields, metadata=schema.metadata)
+
+
+def save_arrow(tables, processed_dir):
+    """Speichert die Tabellen als unkomprimierte Arrow-IPC-Dateien (*.arrow).
+
+    Jede Datei wird erst fertig geschrieben und dann per os.replace
+    ausgetauscht; Prozesse, die die alte Datei noch gemappt haben, lesen
+    ungestört weiter. Gibt die Pfade zurück (leer, wenn pyarrow fehlt).
+    """
+    if not HAS_PYARROW:
+        return []
+    import pyarrow as pa
+
+    os.makedirs(processed_dir, exist_ok=True)
+    paths = []
+    for table, df in tables.items():
+        path = table_path(processed_dir, table, ARROW_EXTENSION)
+        _write_arrow_file(table, df, f"{path}.tmp")
+        os.replace(f"{path}.tmp", path)
+        paths.append(path)
+    return paths
+
+
+def _write_arrow_file(table, df, path):
+    """Schreibt eine Tabelle als unkomprimierte Arrow-IPC-Datei nach path"""
+    import pyarrow as pa
+
+    data = pa.Table.from_pandas(to_typed(df, table), preserve_index=False)
+    data = data.cast(_arrow_schema(table, data.schema, dictionaries=False))
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, data.schema) as writer:
+        writer.write_table(data)
+
+
+def has_arrow(processed_dir):
+    """True, wenn alle drei Tabellen als Arrow-IPC vorliegen"""
+    return HAS_PYARROW and all(os.path.exists(table_path(processed_dir, table, ARROW_EXTENSION))
+                               for table in TABLES)
+
+
+def load_arrow(processed_dir):
+    """Lädt die drei Tabellen per Memory-Mapping aus den Arrow-IPC-Dateien.
+
+    Die Daten werden nicht eingelesen, sondern direkt aus dem Page-Cache
+    des Betriebssystems verwendet: Ganzzahl-Spalten ohne Lücken, Datum und
+    Strings (als pyarrow-gestützte str-Spalten) bleiben ohne Kopie, mehrere
+    Prozesse teilen sich also dieselbe physische Kopie.
+    """
+    import numpy as np
+    import pyarrow as pa
+
+    # Strings mit NaN statt pd.NA, damit Vergleiche wie bei CSV normale bool-Masken liefern
+    string_dtype = pd.StringDtype("pyarrow", na_value=np.nan)
+    tables = {}
+    for table in TABLES:
+        source = pa.memory_map(table_path(processed_dir, table, ARROW_EXTENSION), "r")
+        data = pa.ipc.open_file(source).read_all()
+        df = data.to_pandas(split_blocks=True, types_mapper={pa.string(): string_dtype}.get)
+        tables[table] = from_typed(df)
+    return tables
+
+
+# Eingebettete SQLite-Datenbank mit denselben drei Tabellen (Tabellenname = Dateiname)
+SQLITE_FILE = "handball.sqlite"
+
+# Indizes je Tabelle, damit Abfragen nach Spiel, Team, Spieler oder Ereignis nicht alles lesen
+SQLITE_INDEXES = {
+    'games': [['spielnummer'], ['heimmannschaft'], ['gastmannschaft'], ['pdf_file']],
+    'players': [['spielnummer'], ['team'], ['name'], ['pdf_file']],
+    'events': [['spielnummer'], ['team'], ['spieler'], ['ereignis'], ['pdf_file']],
+}
+
+
+def sqlite_path(processed_dir):
+    """Pfad der SQLite-Datenbank im Verarbeitungsordner"""
+    return os.path.join(processed_dir, SQLITE_FILE)
+
+
+def has_sqlite(processed_dir):
+    """True, wenn die SQLite-Datenbank vorliegt"""
+    return os.path.exists(sqlite_path(processed_dir))
+
+
+def _to_sqlite_frame(df, table):
+    """Typisierte Tabelle -> SQLite-taugliche Spalten (Kategorien als Text, Datum ISO)"""
+    df = to_typed(df, table)
+    for col in CATEGORY_COLUMNS[table]:
+        if col in df.columns:
+            df[col] = df[col].astype(object)
+    if 'datum' in df.columns:
+        df['datum'] = df['datum'].dt.strftime('%Y-%m-%d')
+    return df
+
+
+def create_sqlite_indexes(conn):
+    """Legt die Indizes aus SQLITE_INDEXES an (nach dem Befüllen, das ist schneller)"""
+    for table, indexes in SQLITE_INDEXES.items():
+        for columns in indexes:
+            name = f"idx_{TABLES[table]}_{'_'.join(columns)}"
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {TABLES[table]} ({', '.join(columns)})")
+    conn.execute("ANALYZE")
+    conn.commit()
+
+
+def save_sqlite(tables, processed_dir):
+    """Schreibt {'games': df, 'players': df, 'events': df} in eine neue SQLite-Datenbank.
+
+    Die Datenbank wird unter einem temporären Namen aufgebaut und erst
+    danach ausgetauscht, Leser sehen also nie einen halben Stand.
+    """
+    os.makedirs(processed_dir, exist_ok=True)
+    path = sqlite_path(processed_dir)
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        for table, df in tables.items():
+            _to_sqlite_frame(df, table).to_sql(TABLES[table], conn, index=False)
+        create_sqlite_indexes(conn)
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+    return path
+
+
+def connect_sqlite(processed_dir):
+    """Öffnet die SQLite-Datenbank nur lesend"""
+    uri = "file:" + os.path.abspath(sqlite_path(processed_dir)).replace(os.sep, "/") + "?mode=ro"
+    return sqlite3.connect(uri, uri=True)
+
+
+def from_sqlite(df, table):
+    """Passt aus SQLite gelesene Spalten an die CSV-Semantik der Analysen an.
+
+    Leere Ergebnisse kommen aus read_sql_query als object-Spalten zurück,
+    daher werden die Ganzzahlspalten immer numerisch gemacht.
+    """
+    for col in INT_COLUMNS[table]:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    if table == 'games' and 'datum' in df.columns:
+        df['datum'] = pd.to_datetime(df['datum'], format='%Y-%m-%d', errors='coerce')
+    if table == 'players' and 'disqualifikation' in df.columns:
+        df['disqualifikation'] = df['disqualifikation'].astype(bool)
+    return from_typed(df)
+
+
+def load_sqlite(processed_dir, spielnummer=None, team=None):
+    """Lädt die drei Tabellen aus SQLite, optional nur für bestimmte Spiele.
+
+    spielnummer und team können einzelne Werte oder Listen sein. Gefiltert
+    wird in der Datenbank über die Indizes; geladen werden die passenden
+    Spiele samt allen Spielern und Ereignissen beider Mannschaften.
+    """
+    games_filter, params = sqlite_games_filter(spielnummer, team)
+    with closing(connect_sqlite(processed_dir)) as conn:
+        tables = {}
+        for table in TABLES:
+            sql = f"SELECT * FROM {TABLES[table]}"
+            if games_filter and table == 'games':
+                sql += f" WHERE {games_filter}"
+            elif games_filter:
+                sql += f" WHERE pdf_file IN (SELECT pdf_file FROM {TABLES['games']} WHERE {games_filter})"
+            tables[table] = from_sqlite(pd.read_sql_query(sql, conn, params=params), table)
+    return tables
+
+
+def sqlite_games_filter(spielnummer=None, team=None):
+    """WHERE-Bedingung (ohne 'WHERE') und Parameter für die Spiele-Tabelle.
+
+    Gibt ('', []) zurück, wenn nicht gefiltert wird.
+    """
+    where, params = [], []
+    for value, columns in ((spielnummer, ['spielnummer']), (team, ['heimmannschaft', 'gastmannschaft'])):
+        if value is None:
+            continue
+        values = [value] if pd.api.types.is_scalar(value) else list(value)
+        # numpy-Skalare (z.B. aus df['spielnummer']) kann sqlite3 nicht binden
+        values = [v.item() if hasattr(v, 'item') else v for v in values]
+        placeholders = ", ".join("?" * len(values))
+        where.append("(" + " OR ".join(f"{col} IN ({placeholders})" for col in columns) + ")")
+        params.extend(values * len(columns))
+    return " AND ".join(where), params
+
+
+def query_sqlite(processed_dir, sql, params=()):
+    """Führt eine Abfrage (z.B. eine Aggregation) direkt in der Datenbank aus"""
+    with closing(connect_sqlite(processed_dir)) as conn:
+        return pd.read_sql_query(sql, conn, params=list(params))
+
+
+# Partitioniertes Dataset: <dataset>/<tabelle>/liga=.../saison=.../spieltag=.../part-*.parquet
+DATASET_DIR = "dataset"
+PARTITION_COLUMNS = ['liga', 'saison', 'spieltag']
+UNKNOWN_PARTITION = "unbekannt"
+
+
+def dataset_dir(processed_dir):
+    """Wurzelordner des partitionierten Datasets"""
+    return os.path.join(processed_dir, DATASET_DIR)
+
+
+def has_dataset(processed_dir):
+    """True, wenn bereits Spiele im partitionierten Dataset liegen"""
+    return HAS_PYARROW and os.path.isdir(os.path.join(dataset_dir(processed_dir), TABLES['games']))
+
+
+def dataset_is_newer(processed_dir, extension):
+    """True, wenn das Dataset zuletzt nach den flachen Tabellen (z.B. 'parquet') geschrieben wurde"""
+    newest = max((os.stat(os.path.join(root, name)).st_mtime_ns
+                  for root, _, files in os.walk(dataset_dir(processed_dir))
+                  for name in files if name.endswith(".parquet")), default=0)
+    return newest > min(os.stat(table_path(processed_dir, table, extension)).st_mtime_ns for table in TABLES)
+
+
+def season_of(datum):
+    """Saison eines Spieldatums (Juli bis Juni), z.B. 20.09.2025 -> '2025-26'"""
+    if pd.isna(datum):
+        return UNKNOWN_PARTITION
+    start = datum.year if datum.month >= 7 else datum.year - 1
+    return f"{start}-{(start + 1) % 100:02d}"
+
+
+def partition_keys(df_games):
+    """Partitionsschlüssel (Liga, Saison, Spieltag) je PDF aus den Spielinfos.
+
+    Die Liga ist der Unterordner in data/raw (siehe scraper.league_folder_from_url).
+    """
+    pdf_file = df_games['pdf_file'].astype(str)
+    datum = pd.to_datetime(df_games['datum'], format='%d.%m.%Y', errors='coerce') \
+        if not pd.api.types.is_datetime64_any_dtype(df_games['datum']) else df_games['datum']
+    liga = pdf_file.map(lambda p: os.path.dirname(p).replace(os.sep, "_") or UNKNOWN_PARTITION)
+    return pd.DataFrame({
+        'pdf_file': pdf_file,
+        'liga': liga,
+        'saison': datum.map(season_of),
+        'spieltag': datum.dt.strftime('%Y-%m-%d').fillna(UNKNOWN_PARTITION),
+    })
+
+
+def _to_arrow(df):
+    """DataFrame -> Arrow-Tabelle; reine Null-Spalten werden zu Strings (einheitliches Schema)"""
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for i, field in enumerate(table.schema):
+        if pa.types.is_null(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(pa.string()))
+    return table
+
+
+def ingested_pdf_files(processed_dir):
+    """Menge der PDFs, deren Spiele bereits im Dataset liegen (liest nur eine Spalte)"""
+    if not has_dataset(processed_dir):
+        return set()
+    import pyarrow.dataset as ds
+
+    games = ds.dataset(os.path.join(dataset_dir(processed_dir), TABLES['games']),
+                       format="parquet", partitioning="hive")
+    return set(games.to_table(columns=['pdf_file']).column('pdf_file').to_pylist())
+
+
+def append_partitions(tables, processed_dir):
+    """Hängt neue Spiele als neue Parquet-Dateien an die passenden Partitionen an.
+
+    Bestehende Dateien werden nie umgeschrieben, der Aufwand wächst also nur
+    mit den neuen Daten. Spiele, deren PDF schon im Dataset liegt, werden
+    übersprungen. Gibt die Anzahl neu angehängter Spiele zurück.
+    """
+    import uuid
+    import pyarrow.dataset as ds
+
+    existing = ingested_pdf_files(processed_dir)
+    keys = partition_keys(tables['games'])
+    keys = keys[~keys['pdf_file'].isin(existing)]
+    if keys.empty:
+        return 0
+
+    token = uuid.uuid4().hex[:12]
+    for table, df in tables.items():
+        df = to_typed(df, table)
+        df = df[df['pdf_file'].astype(str).isin(keys['pdf_file'])]
+        df = df.drop(columns=[c for c in PARTITION_COLUMNS if c in df.columns])
+        df = df.merge(keys, on='pdf_file', how='left')
+        for col in PARTITION_COLUMNS:
+            df[col] = df[col].fillna(UNKNOWN_PARTITION).astype(str)
+        if df.empty:
+            continue
+        ds.write_dataset(
+            _to_arrow(df),
+            os.path.join(dataset_dir(processed_dir), TABLES[table]),
+            format="parquet",
+            partitioning=PARTITION_COLUMNS,
+            partitioning_flavor="hive",
+            basename_template=f"part-{token}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+    return len(keys)
+
+
+def compact_partitions(processed_dir):
+    """Fasst alle Teil-Dateien einer Partition zu einer einzigen Datei zusammen.
+
+    Gibt die Anzahl kompaktierter Partitionen zurück.
+    """
+    import uuid
+    import pyarrow.parquet as pq
+
+    compacted = 0
+    for root, _, files in os.walk(dataset_dir(processed_dir)):
+        parts = sorted(f for f in files if f.startswith("part-") and f.endswith(".parquet"))
+        if len(parts) < 2:
+            continue
+        # partitioning=None: Partitionsspalten stehen nur im Pfad, nicht in der Datei
+        table = pq.read_table([os.path.join(root, f) for f in parts], partitioning=None)
+        # Punkt-Präfix: halbfertige Dateien werden von Lesern ignoriert
+        tmp_path = os.path.join(root, ".compact.tmp")
+        pq.write_table(table, tmp_path, compression='zstd')
+        os.replace(tmp_path, os.path.join(root, f"part-{uuid.uuid4().hex[:12]}-compact.parquet"))
+        for f in parts:
+            os.remove(os.path.join(root, f))
+        compacted += 1
+    return compacted
+
+
+def load_partitions(processed_dir, liga=None, saison=None, spieltag_von=None, spieltag_bis=None):
+    """Lädt nur die Partitionen, die zu den Filtern passen (Partition-Pruning).
+
+    liga und saison können einzelne Werte oder Listen sein, spieltag_von/-bis
+    sind ISO-Daten ('2025-09-01'). Gibt ein Dict von DataFrames zurück.
+    """
+    import pyarrow.dataset as ds
+
+    expression = None
+
+    def add(condition):
+        nonlocal expression
+        expression = condition if expression is None else expression & condition
+
+    for col, value in (('liga', liga), ('saison', saison)):
+        if value is not None:
+            values = [value] if isinstance(value, str) else list(value)
+            add(ds.field(col).isin(values))
+    if spieltag_von is not None:
+        add(ds.field('spieltag') >= spieltag_von)
+    if spieltag_bis is not None:
+        add(ds.field('spieltag') <= spieltag_bis)
+
+    tables = {}
+    for table in TABLES:
+        dataset = ds.dataset(os.path.join(dataset_dir(processed_dir), TABLES[table]),
+                             format="parquet", partitioning="hive")
+        df = dataset.to_table(filter=expression).to_pandas()
+        tables[table] = from_typed(df.sort_values('pdf_file', kind='stable').reset_index(drop=True))
+    return tables
+
+
+# Feste Spaltenreihenfolge beim batchweisen Schreiben (wie von pdf_parser erzeugt)
+TABLE_COLUMNS = {
+    'games': ['spielnummer', 'datum', 'spielbeginn', 'heimmannschaft', 'gastmannschaft', 'endstand_heim',
+              'endstand_gast', 'halbzeit_heim', 'halbzeit_gast', 'spielort', 'pdf_file'],
+    'players': ['trikotnummer', 'name', 'tore', 'siebenmeter_tore', 'siebenmeter_versuche', 'gelbe_karten',
+                'zweiminuten_strafen', 'disqualifikation', 'team', 'pdf_file', 'spielnummer'],
+    'events': ['team', 'zeit', 'stand_heim', 'stand_gast', 'ereignis', 'trikotnummer', 'spieler', 'pdf_file',
+               'spielnummer'],
+}
+
+# Ein Spieler pro Spiel, Team und Trikotnummer (spätere Duplikate werden verworfen)
+PLAYER_KEY = ['spielnummer', 'team', 'trikotnummer']
+
+# Journal des streamenden Schreibens: ein Unterordner je fertigem Batch (für resume)
+JOURNAL_DIR = "teillauf"
+
+
+def journal_dir(processed_dir):
+    """Ordner mit den fertigen Batches eines laufenden oder abgebrochenen TableSink"""
+    return os.path.join(processed_dir, JOURNAL_DIR)
+
+
+def _journal_batches(processed_dir):
+    """Pfade der fertigen Batches in Schreibreihenfolge (halb geschriebene *.tmp zählen nicht)"""
+    root = journal_dir(processed_dir)
+    if not os.path.isdir(root):
+        return []
+    return [os.path.join(root, name) for name in sorted(os.listdir(root)) if name.isdigit()]
+
+
+def _journal_file(batch_dir, table):
+    # Parquet mit pandas-Metadaten gibt die Batches unverändert zurück; ohne pyarrow Pickle
+    return os.path.join(batch_dir, f"{TABLES[table]}.{'parquet' if HAS_PYARROW else 'pkl'}")
+
+
+def _read_journal(batch_dir, table, columns=None):
+    path = _journal_file(batch_dir, table)
+    if HAS_PYARROW:
+        return pd.read_parquet(path, columns=columns)
+    df = pd.read_pickle(path)
+    return df if columns is None else df[columns]
+
+
+def journal_pdf_files(processed_dir):
+    """Menge der PDFs, die ein abgebrochener Lauf schon in fertigen Batches abgelegt hat"""
+    files = set()
+    for batch_dir in _journal_batches(processed_dir):
+        files.update(_read_journal(batch_dir, 'games', ['pdf_file'])['pdf_file'])
+    return files
+
+
+class TableSink:
+    """Schreibt die drei Tabellen batchweise als CSV, Parquet und Arrow-IPC.
+
+    Jeder Batch (write_batch) wird zuerst als eigener Ordner im Journal
+    (journal_dir) abgelegt und dann an temporäre Dateien (*.tmp) angehängt;
+    im Speicher liegt nie mehr als ein Batch. Erst wenn der Lauf vollständig
+    ist, ersetzen CSV, Parquet, Arrow-IPC (und mit sqlite=True die
+    SQLite-Datenbank) die bisherigen Dateien und das Journal wird gelöscht.
+    Bricht ein Lauf ab, bleiben die bisherigen Ergebnisse unangetastet und
+    die fertigen Batches im Journal erhalten (je Tabelle eine gültige
+    Parquet-Datei). Mit resume=True werden sie zuerst wieder eingespielt,
+    der Aufrufer parst nur noch die übrigen PDFs (journal_pdf_files).
+    Ohne resume wird ein altes Journal verworfen. Als Context-Manager
+    verwenden.
+    """
+
+    def __init__(self, processed_dir, parquet=True, sqlite=False, resume=False):
+        os.makedirs(processed_dir, exist_ok=True)
+        self.processed_dir = processed_dir
+        self.parquet = parquet and HAS_PYARROW
+        self.sqlite = None
+        if sqlite:
+            tmp_path = f"{sqlite_path(processed_dir)}.tmp"
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            self.sqlite = sqlite3.connect(tmp_path)
+        self.rows = {table: 0 for table in TABLES}
+        self.duplicates = 0
+        self.resumed_batches = 0
+        self._batches = 0
+        # Spielnummern früherer Batches: ein Spiel gehört ganz zum ersten Batch, in dem es vorkommt
+        self._seen_games = set()
+        self._csv = {}
+        self._parquet = {}
+        self._arrow = {}
+        self._tmp_paths = {}
+
+        batches = _journal_batches(processed_dir) if resume else []
+        if not resume:
+            shutil.rmtree(journal_dir(processed_dir), ignore_errors=True)
+        for batch_dir in batches:
+            with open(os.path.join(batch_dir, "batch.json"), encoding="utf-8") as f:
+                self.duplicates += json.load(f)['duplikate']
+            self._write_tables({table: _read_journal(batch_dir, table) for table in TABLES})
+        self.resumed_batches = self._batches = len(batches)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close(*exc_info)
+
+    def write_batch(self, df_games, df_players, df_events, duplicates=0):
+        """Hängt einen Batch (DataFrames im Format von pdf_parser.build_dataframes) an.
+
+        duplicates sind die schon vorher verworfenen Spieler (für die Statistik).
+        Gibt die geschriebenen Spieler zurück, ohne Duplikate früherer Batches.
+        """
+        tables = {'games': df_games, 'players': df_players, 'events': df_events}
+        batch_dir = os.path.join(journal_dir(self.processed_dir), f"{self._batches:06d}")
+        tmp_dir = f"{batch_dir}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        for table, df in tables.items():
+            if HAS_PYARROW:
+                df.to_parquet(_journal_file(tmp_dir, table), index=False)
+            else:
+                df.to_pickle(_journal_file(tmp_dir, table))
+        with open(os.path.join(tmp_dir, "batch.json"), "w", encoding="utf-8") as f:
+            json.dump({'duplikate': duplicates}, f)
+        os.replace(tmp_dir, batch_dir)
+        self._batches += 1
+
+        self.duplicates += duplicates
+        return self._write_tables(tables)
+
+    def _write_tables(self, tables):
+        players = self._drop_seen_players(tables['players'])
+        self._seen_games.update(n for n in tables['games']['spielnummer'] if not pd.isna(n))
+        for table in TABLES:
+            self._write(table, players if table == 'players' else tables[table])
+        return players
+
+    def _write(self, table, df):
+        df = df.reindex(columns=TABLE_COLUMNS[table])
+        if df.empty:
+            return
+
+        f = self._csv.get(table)
+        if f is None:
+            f = self._csv[table] = open(self._tmp_path(table, "csv"), "w", encoding="utf-8-sig", newline="")
+        df.to_csv(f, index=False, header=self.rows[table] == 0)
+        f.flush()
+
+        if self.parquet:
+            self._write_parquet(table, df)
+        if self.sqlite is not None:
+            _to_sqlite_frame(df, table).to_sql(TABLES[table], self.sqlite, index=False, if_exists='append')
+        self.rows[table] += len(df)
+
+    def _drop_seen_players(self, df):
+        """Verwirft Duplikate im Batch und Spieler von Spielen, die schon ein früherer Batch geschrieben hat.
+
+        Gemerkt wird nur die Spielnummer je Spiel, nicht jeder Spieler-Schlüssel.
+        """
+        seen = df['spielnummer'].isin(self._seen_games).to_numpy() | df.duplicated(subset=PLAYER_KEY).to_numpy()
+        self.duplicates += int(seen.sum())
+        return df[~seen]
+
+    def _tmp_path(self, table, extension):
+        """Temporärer Pfad einer Ausgabedatei (wird in close() befördert oder gelöscht)"""
+        path = table_path(self.processed_dir, table, extension)
+        self._tmp_paths[f"{path}.tmp"] = path
+        return f"{path}.tmp"
+
+    def _write_parquet(self, table, df):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        batch = pa.Table.from_pandas(to_typed(df, table), preserve_index=False)
+        writer = self._parquet.get(table)
+        if writer is None:
+            # Schema aus dem ersten Batch, aber unabhängig von dessen Inhalt festlegen
+            writer = self._parquet[table] = pq.ParquetWriter(
+                self._tmp_path(table, "parquet"), _arrow_schema(table, batch.schema), compression='zstd')
+        writer.write_table(batch.cast(writer.schema))
+
+        if table not in self._arrow:
+            # RecordBatchFileWriter kennt sein Schema nicht, daher mit ablegen
+            schema = _arrow_schema(table, batch.schema, dictionaries=False)
+            sink = pa.OSFile(self._tmp_path(table, ARROW_EXTENSION), "wb")
+            self._arrow[table] = (sink, pa.ipc.new_file(sink, schema), schema)
+        _, arrow_writer, schema = self._arrow[table]
+        arrow_writer.write_table(batch.cast(schema))
+
+    def close(self, *exc_info):
+        failed = bool(exc_info and exc_info[0] is not None)
+        if not failed:
+            # Leere Tabellen trotzdem (nur mit Kopfzeile) schreiben, damit keine alten Dateien stehen bleiben
+            for table in TABLES:
+                if table in self._csv:
+                    continue
+                empty = pd.DataFrame(columns=TABLE_COLUMNS[table])
+                empty.to_csv(self._tmp_path(table, "csv"), index=False, encoding="utf-8-sig")
+                if self.parquet:
+                    to_typed(empty, table).to_parquet(self._tmp_path(table, "parquet"), index=False,
+                                                      compression='zstd')
+                    _write_arrow_file(table, empty, self._tmp_path(table, ARROW_EXTENSION))
+                if self.sqlite is not None:
+                    _to_sqlite_frame(empty, table).to_sql(TABLES[table], self.sqlite, index=False)
+        for f in self._csv.values():
+            f.close()
+        for writer in self._parquet.values():
+            writer.close()
+        for sink, writer, _ in self._arrow.values():
+            writer.close()
+            sink.close()
+        # Abgebrochene Läufe lassen die bisherigen Dateien unangetastet, das Journal bleibt für resume
+        for tmp_path, path in self._tmp_paths.items():
+            if failed:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            else:
+                os.replace(tmp_path, path)
+        self._csv = {}
+        self._parquet = {}
+        self._arrow = {}
+        self._tmp_paths = {}
+        if self.sqlite is not None:
+            self._close_sqlite(failed)
+        if not failed:
+            shutil.rmtree(journal_dir(self.processed_dir), ignore_errors=True)
+
+    def _close_sqlite(self, failed):
+        conn, self.sqlite = self.sqlite, None
+        path = sqlite_path(self.processed_dir)
+        try:
+            if not failed:
+                create_sqlite_indexes(conn)
+        finally:
+            conn.close()
+        # Abgebrochene Läufe lassen die bisherige Datenbank unangetastet
+        if failed:
+            os.remove(f"{path}.tmp")
+        else:
+            os.replace(f"{path}.tmp", path)
@@ -0,0 +1,281 @@
+import os
+import random
+import argparse
+from datetime import date, timedelta
+
+# Zielordner für synthetische Spielberichte
+SYNTHETIC_DIR = "../data/synthetic"
+
+# Spiele pro Liga (12 Teams, Hin- und Rückrunde)
+TEAMS_PER_LEAGUE = 12
+GAMES_PER_LEAGUE = TEAMS_PER_LEAGUE * (TEAMS_PER_LEAGUE - 1)
+
+# Zeilen pro PDF-Seite (ergibt wie bei echten Berichten 2-3 Seiten)
+LINES_PER_PAGE = 70
+
+# Ende der 1. Halbzeit in Sekunden; ein Tor bei 30:00 zählt noch zum Halbzeitstand (wie audit.HALF_TIME)
+HALF_TIME = 30 * 60
+
+VEREINSFORMEN = ["TSV", "SG", "HSG", "MTV", "TV", "VfL", "SV", "HC", "TuS", "HG", "VfB", "MTV Groß"]
+ORTE = ["Braunschweig", "Lüneburg", "Uelzen", "Celle", "Gifhorn", "Wolfsburg", "Peine", "Salzgitter",
+        "Goslar", "Hildesheim", "Sehnde", "Wittingen", "Dannenberg", "Seevetal", "Buxtehude", "Stade",
+        "Verden", "Nienburg", "Hameln", "Northeim", "Einbeck", "Helmstedt", "Burgdorf", "Lehrte"]
+NACHNAMEN = ["Müller", "Schmidt", "Schneider", "Fischer", "Weber", "Meyer", "Wagner", "Becker", "Schulz",
+             "Hoffmann", "Koch", "Richter", "Klein", "Wolf", "Schröder", "Neumann", "Schwarz", "Braun",
+             "Zimmermann", "Krüger", "Hartmann", "Lange", "Werner", "Krause", "Lehmann", "Köhler"]
+VORNAMEN = ["Jan", "Lukas", "Finn", "Jonas", "Leon", "Paul", "Tim", "Niklas", "Felix", "Moritz", "Max",
+            "Ben", "Tom", "Nils", "Erik", "Malte", "Jannik", "Ole", "Hendrik", "Sören", "Björn", "Till"]
+
+# Sortierung wie in pdf_parser.EVENT_ORDER
+_EVENT_ORDER = {name: rank for rank, name in enumerate(
+    ['Tor', '7m-Tor', '7m-Fehlwurf', '2-Minuten', 'Disqualifikation', 'Auszeit'])}
+
+# Schlüsselwort im Spielverlauf je Ereignis
+_EVENT_KEYWORDS = {
+    'Tor': 'Tor',
+    '7m-Tor': '7m mit Tor',
+    '7m-Fehlwurf': '7m ohne Tor',
+    '2-Minuten': '2 Minuten',
+    'Disqualifikation': 'ohne Bericht',
+}
+
+
+def _clock(seconds):
+    return f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+
+def make_teams(rng, count=TEAMS_PER_LEAGUE):
+    """Erzeugt eindeutige Vereinsnamen"""
+    teams = set()
+    while len(teams) < count:
+        teams.add(f"{rng.choice(VEREINSFORMEN)} {rng.choice(ORTE)}")
+    return sorted(teams)
+
+
+def make_roster(rng):
+    """Kader aus 10-16 Spielern mit eindeutigen Trikotnummern"""
+    size = rng.randint(10, 16)
+    numbers = rng.sample(range(1, 100), size)
+    return [{'trikotnummer': str(nr), 'name': f"{rng.choice(NACHNAMEN)}, {rng.choice(VORNAMEN)}"}
+            for nr in sorted(numbers)]
+
+
+def simulate_game(rng, spielnummer, datum, heim, gast):
+    """Simuliert ein Spiel und gibt (Spielinfo, Spieler, Ereignisse) im Format des Parsers zurück.
+
+    Die Datensätze entsprechen genau dem, was pdf_parser.parse_sections aus
+    dem zugehörigen Bericht extrahieren soll (ohne pdf_file).
+    """
+    rosters = {'Heim': make_roster(rng), 'Gast': make_roster(rng)}
+    raw_events = []
+    for side, roster in rosters.items():
+        # Wenige Spieler werfen die meisten Tore
+        weights = [rng.random() ** 2 + 0.05 for _ in roster]
+        siebenmeter = rng.randint(0, 6)
+        for _ in range(rng.randint(18, 36)):
+            raw_events.append((rng.randrange(3600), 'Tor', side, rng.choices(roster, weights)[0]))
+        for _ in range(siebenmeter):
+            ereignis = '7m-Tor' if rng.random() < 0.75 else '7m-Fehlwurf'
+            raw_events.append((rng.randrange(3600), ereignis, side, rng.choices(roster, weights)[0]))
+        for _ in range(rng.randint(0, 6)):
+            raw_events.append((rng.randrange(3600), '2-Minuten', side, rng.choice(roster)))
+        if rng.random() < 0.08:
+            raw_events.append((rng.randrange(600, 3600), 'Disqualifikation', side, rng.choice(roster)))
+        for _ in range(rng.randint(0, 3)):
+            raw_events.append((rng.randrange(3600), 'Auszeit', side, None))
+    raw_events.sort(key=lambda e: e[0])
+
+    stats = {(side, p['trikotnummer']): {'tore': 0, 'sm_tore': 0, 'sm_versuche': 0, 'strafen': [], 'disq': False}
+             for side, roster in rosters.items() for p in roster}
+    score = {'Heim': 0, 'Gast': 0}
+    halbzeit = None
+    events = []
+    for seconds, ereignis, side, player in raw_events:
+        if halbzeit is None and seconds > HALF_TIME:
+            halbzeit = dict(score)
+        zeit = _clock(seconds)
+        if ereignis == 'Auszeit':
+            events.append({'team': side, 'zeit': zeit, 'stand_heim': None, 'stand_gast': None,
+                           'ereignis': 'Auszeit', 'trikotnummer': None, 'spieler': None})
+            continue
+
+        stat = stats[(side, player['trikotnummer'])]
+        if ereignis in ('Tor', '7m-Tor'):
+            score[side] += 1
+            stat['tore'] += 1
+        if ereignis in ('7m-Tor', '7m-Fehlwurf'):
+            stat['sm_versuche'] += 1
+            stat['sm_tore'] += ereignis == '7m-Tor'
+        if ereignis == '2-Minuten':
+            stat['strafen'].append(zeit)
+        if ereignis == 'Disqualifikation':
+            stat['disq'] = True
+        wurf = ereignis in ('Tor', '7m-Tor', '7m-Fehlwurf')
+        events.append({'team': side, 'zeit': zeit,
+                       'stand_heim': score['Heim'] if wurf else None,
+                       'stand_gast': score['Gast'] if wurf else None,
+                       'ereignis': ereignis, 'trikotnummer': player['trikotnummer'],
+                       'spieler': player['name']})
+    if halbzeit is None:
+        halbzeit = dict(score)
+    events.sort(key=lambda e: (e['zeit'], _EVENT_ORDER[e['ereignis']]))
+
+    game_info = {
+        'spielnummer': str(spielnummer),
+        'datum': datum.strftime('%d.%m.%Y'),
+        'spielbeginn': rng.choice(["16:00", "17:00", "18:00", "19:30"]),
+        'heimmannschaft': heim,
+        'gastmannschaft': gast,
+        'endstand_heim': score['Heim'],
+        'endstand_gast': score['Gast'],
+        'halbzeit_heim': halbzeit['Heim'],
+        'halbzeit_gast': halbzeit['Gast'],
+        'spielort': f"Sporthalle {heim.split()[-1]}",
+    }
+
+    players = []
+    for side, team in (('Heim', heim), ('Gast', gast)):
+        for p in rosters[side]:
+            stat = stats[(side, p['trikotnummer'])]
+            players.append({
+                'trikotnummer': p['trikotnummer'],
+                'name': p['name'],
+                'tore': stat['tore'],
+                'siebenmeter_tore': stat['sm_tore'],
+                'siebenmeter_versuche': stat['sm_versuche'],
+                'gelbe_karten': 0,
+                'zweiminuten_strafen': len(stat['strafen']),
+                'disqualifikation': stat['disq'],
+                'team': team,
+                'spielnummer': str(spielnummer),
+            })
+    for event in events:
+        event['spielnummer'] = str(spielnummer)
+
+    return game_info, players, events
+
+
+def report_lines(game_info, players, events):
+    """Zeilen eines Spielberichts im nuLiga-Layout"""
+    heim, gast = game_info['heimmannschaft'], game_info['gastmannschaft']
+    lines = [
+        "Spielbericht",
+        f"Spielnummer {game_info['spielnummer']}",
+        f"Datum {game_info['datum']}, Spielbeginn {game_info['spielbeginn']}",
+        f"Ergebnis {game_info['endstand_heim']}:{game_info['endstand_gast']} "
+        f"({game_info['halbzeit_heim']}:{game_info['halbzeit_gast']})",
+        f"Heimmannschaft {heim}",
+        f"Spielort {game_info['spielort']}",
+        f"Gastmannschaft {gast}",
+    ]
+
+    strafen = {}
+    for event in events:
+        if event['ereignis'] == '2-Minuten':
+            strafen.setdefault((event['team'], event['trikotnummer']), []).append(event['zeit'])
+
+    for label, side, team in (("Heimmannschaft", 'Heim', heim), ("Gastmannschaft", 'Gast', gast)):
+        lines += [label, f"{team} Tore 7m Verw. 2min Disq", "Nr. Name Pass Lizenz Tore 7m Gelb 2-Min Disq"]
+        for p in players:
+            if p['team'] != team:
+                continue
+            parts = []
+            if p['tore']:
+                parts.append(str(p['tore']))
+            if p['siebenmeter_versuche']:
+                parts.append(f"{p['siebenmeter_tore']}/{p['siebenmeter_versuche']}")
+            parts += strafen.get((side, p['trikotnummer']), [])
+            if p['disqualifikation']:
+                parts.append("o.B.")
+            lines.append(f"{p['trikotnummer']} {p['name']} - - {' '.join(parts)}".rstrip())
+        lines.append("7-Meter Verwarnungen Offizielle")
+
+    lines.append("Spielverlauf")
+    for event in events:
+        if event['ereignis'] == 'Auszeit':
+            lines.append(f"{event['zeit']} Auszeit {event['team']}")
+            continue
+        stand = f" {event['stand_heim']}:{event['stand_gast']}" if event['stand_heim'] is not None else ""
+        lines.append(f"{event['team']} {event['zeit']}{stand} {_EVENT_KEYWORDS[event['ereignis']]} "
+                     f"{event['trikotnummer']} {event['spieler']}")
+    lines.append("nu.Dokument erstellt")
+    return lines
+
+
+def page_texts(lines, per_page=LINES_PER_PAGE):
+    """Seitentexte, wie sie die Textextraktion liefern würde"""
+    return ["\n".join(lines[i:i + per_page]) for i in range(0, len(lines), per_page)] or [""]
+
+
+def pdf_bytes(lines, per_page=LINES_PER_PAGE):
+    """Minimales PDF (Helvetica, WinAnsi) mit einer Textzeile pro Zeile"""
+    def escape(text):
+        return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)").encode("cp1252", "replace")
+
+    pages = [lines[i:i + per_page] for i in range(0, len(lines), per_page)] or [[]]
+    page_ids = [4 + 2 * i for i in range(len(pages))]
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{' '.join(f'{p} 0 R' for p in page_ids)}] /Count {len(pages)} >>".encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    for page_id, page_lines in zip(page_ids, pages):
+        content = b"BT /F1 9 Tf 11 TL 40 800 Td " + b" ".join(
+            b"(" + escape(line) + b") Tj T*" for line in page_lines) + b" ET"
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>".encode())
+        objects.append(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return out
+
+
+def iter_games(n_games, seed=0, start=date(2025, 9, 6)):
+    """Erzeugt n_games Spiele als (Liga, Spielinfo, Spieler, Ereignisse).
+
+    Je GAMES_PER_LEAGUE Spiele bilden eine Liga mit eigenem Spielplan
+    (ein Spieltag pro Woche). Gleicher seed ergibt dieselben Spiele.
+    """
+    rng = random.Random(seed)
+    teams = []
+    for i in range(n_games):
+        league, index = divmod(i, GAMES_PER_LEAGUE)
+        if index == 0:
+            teams = make_teams(rng)
+            pairings = [(h, g) for h in teams for g in teams if h != g]
+            rng.shuffle(pairings)
+        heim, gast = pairings[index]
+        datum = start + timedelta(weeks=index // (TEAMS_PER_LEAGUE // 2))
+        spielnummer = 100000 + i
+        yield (f"liga_{league:04d}",) + simulate_game(rng, spielnummer, datum, heim, gast)
+
+
+def generate(out_dir=SYNTHETIC_DIR, n_games=100, seed=0):
+    """Schreibt n_games synthetische Spielberichte als PDFs in Liga-Unterordner"""
+    count = 0
+    for league, game_info, players, events in iter_games(n_games, seed):
+        folder = os.path.join(out_dir, league)
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, f"{game_info['spielnummer']}.pdf"), "wb") as f:
+            f.write(pdf_bytes(report_lines(game_info, players, events)))
+        count += 1
+    print(f"✅ {count} synthetische Spielberichte in {out_dir}")
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Synthetische Spielberichte im nuLiga-Layout erzeugen")
+    parser.add_argument("--games", type=int, default=100, help="Anzahl Spiele")
+    parser.add_argument("--out", default=SYNTHETIC_DIR, help="Zielordner")
+    parser.add_argument("--seed", type=int, default=0, help="Zufalls-Seed (reproduzierbar)")
+    args = parser.parse_args()
+
+    generate(args.out, args.games, args.seed)
@@ -0,0 +1,72 @@
+import pdfplumber
+
+from metrics import NULL_TIMER
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:  # optional: schnelles Backend nur, wenn installiert
+    pdfium = None
+
+# Verfügbare Backends für die Textextraktion
+PDFPLUMBER = "pdfplumber"
+PDFIUM = "pdfium"
+BACKENDS = (PDFPLUMBER, PDFIUM)
+DEFAULT_BACKEND = PDFPLUMBER
+
+
+def _iter_pdfplumber(pdf_path, timer=NULL_TIMER):
+    """Seitentexte über pdfplumber (vollständige Layout-Analyse, langsam)"""
+    with timer.stage('open'):
+        pdf = pdfplumber.open(pdf_path)
+    with pdf:
+        for page in pdf.pages:
+            with timer.stage('text'):
+                text = page.extract_text()
+            yield text
+
+
+def _iter_pdfium(doc, timer=NULL_TIMER):
+    """Seitentexte über pdfium (native Textebene, schnell)"""
+    try:
+        for page in doc:
+            with timer.stage('text'):
+                textpage = page.get_textpage()
+                # pdfium liefert Windows-Zeilenumbrüche, die Regexe erwarten '\n'
+                text = textpage.get_text_range().replace("\r\n", "\n").replace("\r", "\n")
+                textpage.close()
+                page.close()
+            yield text
+    finally:
+        doc.close()
+
+
+def available_backends():
+    """Gibt die im aktuellen Environment nutzbaren Backends zurück"""
+    return [b for b in BACKENDS if b != PDFIUM or pdfium is not None]
+
+
+def iter_pages(pdf_path, backend=DEFAULT_BACKEND, timer=NULL_TIMER):
+    """Liefert den Text jeder Seite erst bei Bedarf (Generator).
+
+    Wird der Generator vorzeitig geschlossen, werden die restlichen Seiten
+    nicht mehr dekodiert. timer (siehe metrics.StageTimer) misst die Stufen
+    'open' und 'text'. Das pdfium-Backend fällt auf pdfplumber zurück,
+    wenn pypdfium2 fehlt oder das PDF nicht öffnen kann.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unbekanntes Backend '{backend}', erlaubt: {', '.join(BACKENDS)}")
+
+    if backend == PDFIUM and pdfium is not None:
+        try:
+            with timer.stage('open'):
+                doc = pdfium.PdfDocument(pdf_path)
+            return _iter_pdfium(doc, timer)
+        except pdfium.PdfiumError as e:
+            print(f"  ⚠ pdfium fehlgeschlagen ({e}), nutze pdfplumber")
+
+    return _iter_pdfplumber(pdf_path, timer)
+
+
+def extract_pages(pdf_path, backend=DEFAULT_BACKEND):
+    """Extrahiert den Text aller Seiten als Liste von Strings"""
+    return list(iter_pages(pdf_path, backend))
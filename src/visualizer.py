@@ -65,9 +65,7 @@ class HandballVisualizer:
             return None
         
         # Spielinfo holen
-        game_info = self.analyzer.df_games[
-            self.analyzer.df_games['spielnummer'] == spielnummer
-        ].iloc[0]
+        game_info = self.analyzer.game_index.game(spielnummer)
         
         fig, ax = plt.subplots(figsize=(14, 8))
         
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Die Module in src/ importieren sich gegenseitig direkt (import storage, ...)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
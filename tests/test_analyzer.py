@@ -0,0 +1,110 @@
+import pandas as pd
+import pytest
+
+import analyzer
+import memo
+import synthetic
+from pdf_parser import build_dataframes, save_csvs
+
+N_GAMES = 12
+N_LOADED = 8
+
+
+def parsed_games(n_games):
+    """Synthetische Spiele im Format von pdf_parser.parse_pdf (Spielnummern als Text)"""
+    games = []
+    for league, game_info, players, events in synthetic.iter_games(n_games):
+        pdf_file = f"{league}/{game_info['spielnummer']}.pdf"
+        for row in [game_info] + players + events:
+            row['pdf_file'] = pdf_file
+        games.append((game_info, players, events))
+    return games
+
+
+def frames(games):
+    return build_dataframes([g for g, _, _ in games], [p for _, ps, _ in games for p in ps],
+                            [e for _, _, es in games for e in es])
+
+
+@pytest.fixture
+def loaded(tmp_path, capsys):
+    """Analyzer mit den ersten N_LOADED Spielen und die restlichen Spiele zum Übernehmen"""
+    games = parsed_games(N_GAMES)
+    save_csvs(*frames(games[:N_LOADED]), processed_dir=str(tmp_path / "teil"))
+    save_csvs(*frames(games), processed_dir=str(tmp_path / "alle"))
+    return analyzer.HandballAnalyzer(str(tmp_path / "teil")), games[N_LOADED:], str(tmp_path / "alle")
+
+
+def test_ingest_matches_full_load(loaded):
+    a, rest, full_dir = loaded
+    assert a.ingest(*frames(rest)) == len(rest)
+    full = analyzer.HandballAnalyzer(full_dir)
+
+    assert len(a.df_players) == len(full.df_players)
+    assert a.df_games['spielnummer'].tolist() == full.df_games['spielnummer'].tolist()
+    assert a.verify_aggregates()
+    assert a.verify_reload()
+    for name in ('get_top_scorer', 'get_team_statistics', 'get_game_tempo', 'get_disqualifications'):
+        assert analyzer._same_result(getattr(a, name)(), getattr(full, name)())
+
+
+def test_ingest_types_parser_ids(loaded):
+    a, rest, _ = loaded
+    a.ingest(*frames(rest))
+    nummer = rest[0][0]['spielnummer']
+    # Spielnummern aus dem Parser sind Text, in den Tabellen Zahlen
+    assert len(a.get_goal_timeline(nummer)) == len(a.get_goal_timeline(int(nummer))) > 0
+    assert a.game_index.game(int(nummer))['pdf_file'] == rest[0][0]['pdf_file']
+    assert {type(n) for n in a.get_game_tempo()['spielnummer']} == {int}
+
+
+def test_ingest_drops_duplicate_players(loaded):
+    a, rest, _ = loaded
+    before = len(a.df_players)
+    df_games, df_players, df_events = frames(rest)
+    a.ingest(df_games, df_players, df_events)
+
+    # Kopie eines geladenen Spiels unter anderem PDF-Namen: Spieler sind Duplikate
+    game_info, players, events = parsed_games(1)[0]
+    copy = [{**row, 'pdf_file': 'kopie.pdf'} for row in [game_info] + players + events]
+    duplicate_players = copy[1:1 + len(players)]
+    assert a.ingest(*build_dataframes([copy[0]], duplicate_players + duplicate_players[:2],
+                                      copy[1 + len(players):])) == 1
+    assert len(a.df_players) == before + len(df_players)
+    assert a.verify_aggregates()
+
+
+def test_ingest_ignores_known_pdfs(loaded):
+    a, rest, _ = loaded
+    a.ingest(*frames(rest))
+    assert a.ingest(*frames(rest)) == 0
+
+
+def test_events_carry_team_names(loaded):
+    a, rest, _ = loaded
+    a.ingest(*frames(rest))
+    games = a.df_games.set_index('pdf_file')
+    expected = [games.at[pdf, 'heimmannschaft' if side == 'Heim' else 'gastmannschaft']
+                for pdf, side in zip(a.df_events['pdf_file'], a.df_events['team'])]
+    assert a.df_events['mannschaft'].tolist() == expected
+    # Tore aus Ereignissen werden jetzt dem richtigen Team-Eintrag zugeordnet
+    performance = a.get_player_performance()
+    assert (performance['tore_aus_events'] == performance['tore']).all()
+    assert set(a.get_penalty_statistics()['team']) <= set(games['heimmannschaft']) | set(games['gastmannschaft'])
+
+
+def test_invalidate_cache_keeps_other_instances(loaded):
+    a, _, _ = loaded
+    b = analyzer.HandballAnalyzer(a.data_dir)
+    assert a.data_version == b.data_version
+    b.get_top_scorer()
+    hits = memo.MEMO_CACHE.hits
+    a.get_top_scorer()
+    assert memo.MEMO_CACHE.hits == hits + 1
+
+    a.invalidate_cache()
+    a.get_top_scorer()
+    assert memo.MEMO_CACHE.hits == hits + 1
+    # b trifft weiterhin seinen Eintrag
+    b.get_top_scorer()
+    assert memo.MEMO_CACHE.hits == hits + 2
@@ -0,0 +1,34 @@
+import pandas as pd
+
+import audit
+
+
+def events(rows):
+    """(Zeit, Heim, Gast[, Ereignis]) -> Spielereignisse eines Spiels"""
+    return pd.DataFrame([{'pdf_file': 'a.pdf', 'spielnummer': 1, 'zeit': row[0],
+                          'ereignis': row[3] if len(row) > 3 else 'Tor',
+                          'stand_heim': row[1], 'stand_gast': row[2]} for row in rows])
+
+
+def test_backward_step_within_one_second_is_found():
+    scored = audit._scored_events(events([("20:05", 11, 11), ("20:10", 12, 11), ("20:10", 11, 11)]))
+    backwards = audit.check_monotonic(scored)
+    assert backwards[['stand_heim', 'stand_gast', 'vorher_heim', 'vorher_gast']].values.tolist() == [[11, 11, 12, 11]]
+
+
+def test_same_second_keeps_report_order():
+    scored = audit._scored_events(events([("20:10", 11, 11), ("20:10", 12, 11), ("19:00", 10, 11)]))
+    assert scored['stand_heim'].tolist() == [10, 11, 12]
+    assert audit.check_monotonic(scored).empty
+
+
+def test_same_second_of_different_types_may_be_swapped():
+    # Der Parser sortiert 'Tor' vor '7m-Tor', auch wenn der 7m zuerst fiel
+    scored = audit._scored_events(events([("56:53", 24, 19, 'Tor'), ("56:53", 24, 18, '7m-Tor')]))
+    assert audit.check_monotonic(scored).empty
+
+
+def test_final_score_ignores_order_within_last_second():
+    scored = audit._scored_events(events([("59:58", 24, 19, 'Tor'), ("59:58", 24, 18, '7m-Tor')]))
+    games = pd.DataFrame([{'pdf_file': 'a.pdf', 'spielnummer': 1, 'endstand_heim': 24, 'endstand_gast': 19}])
+    assert audit.check_final_score(games, scored).empty
@@ -0,0 +1,269 @@
+import asyncio
+import hashlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import scraper
+
+PDF_BODY = b"%PDF-1.4\n" + b"x" * 4096
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Lokaler Ersatz für nuLiga: Antworten je Pfad werden vorab festgelegt.
+
+    server.script[pfad] ist eine Liste von (Status, Header); der letzte
+    Eintrag gilt für alle weiteren Requests. Ein dritter Eintrag ersetzt
+    den gesendeten Body (z. B. abgeschnitten), 206 beantwortet den
+    Range-Header. Jeder Request wird mit Zeitpunkt und Host in
+    server.requests, seine Header in server.headers protokolliert. server.bodies
+    legt je Pfad den Body für 200 fest (sonst PDF_BODY), server.delay
+    verzögert jede Antwort, server.peak zählt gleichzeitige Requests.
+    """
+
+    def do_GET(self):
+        self.server.requests.append((self.path, self.headers.get('Host'), time.monotonic()))
+        with self.server.lock:
+            self.server.active += 1
+            self.server.peak = max(self.server.peak, self.server.active)
+        time.sleep(self.server.delay)
+        with self.server.lock:
+            self.server.active -= 1
+        self.server.headers.append(dict(self.headers))
+        path = self.path.split("?")[0]
+        script = self.server.script.get(path, [(404, {})])
+        status, headers, *sent = script.pop(0) if len(script) > 1 else script[0]
+        body = self.server.bodies.get(path, PDF_BODY)
+        if status == 206:
+            start = int(self.headers['Range'].split("=")[1].rstrip("-"))
+            headers = {"Content-Range": f"bytes {start}-{len(body) - 1}/{len(body)}", **headers}
+            body = body[start:]
+        elif status != 200:
+            body = b""
+        headers = {"Content-Length": str(len(body)), **headers}
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(sent[0] if sent else body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    httpd.script = {}
+    httpd.bodies = {}
+    httpd.requests = []
+    httpd.headers = []
+    httpd.delay = 0
+    httpd.lock = threading.Lock()
+    httpd.active = httpd.peak = 0
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def url(server, path, host="127.0.0.1"):
+    return f"http://{host}:{server.server_address[1]}{path}"
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_retry_after_is_honoured(server, status):
+    server.script["/pdf"] = [(status, {"Retry-After": "1"}), (200, {})]
+    with scraper.create_session() as session:
+        start = time.monotonic()
+        response = scraper.get_with_retry(session, url(server, "/pdf"), retries=2, backoff=0.01)
+        elapsed = time.monotonic() - start
+    assert response.status_code == 200
+    assert response.content == PDF_BODY
+    assert len(server.requests) == 2
+    # Backoff allein wären 0.01 s, Retry-After verlangt 1 s
+    assert elapsed >= 0.9
+
+
+def test_retry_after_http_date():
+    response = requests.Response()
+    response.headers["Retry-After"] = "Wed, 21 Oct 2015 07:28:00 GMT"
+    assert scraper.retry_after_seconds(response) == 0.0
+    response.headers["Retry-After"] = "3600"
+    assert scraper.retry_after_seconds(response) == scraper.MAX_RETRY_AFTER
+
+
+def test_backoff_gives_up_after_retries(server):
+    server.script["/pdf"] = [(503, {})]
+    with scraper.create_session() as session, pytest.raises(requests.HTTPError):
+        scraper.get_with_retry(session, url(server, "/pdf"), retries=2, backoff=0.01)
+    assert len(server.requests) == 3
+
+
+def test_no_retry_on_client_error(server):
+    with scraper.create_session() as session, pytest.raises(requests.HTTPError):
+        scraper.get_with_retry(session, url(server, "/fehlt"), retries=3, backoff=0.01)
+    assert len(server.requests) == 1
+
+
+def test_rate_limit_spaces_requests_per_host(server):
+    server.script["/pdf"] = [(200, {})]
+    limiter = scraper.HostRateLimiter(rate=20)
+    with scraper.create_session() as session:
+        for _ in range(4):
+            for host in ("127.0.0.1", "localhost"):
+                scraper.get_with_retry(session, url(server, "/pdf", host), limiter=limiter)
+
+    for host in ("127.0.0.1", "localhost"):
+        times = [t for _, h, t in server.requests if h.startswith(host)]
+        assert len(times) == 4
+        gaps = [b - a for a, b in zip(times, times[1:])]
+        assert min(gaps) >= 0.04   # 1/20 s, mit etwas Toleranz
+
+    # Verschiedene Hosts bremsen sich nicht gegenseitig
+    first = [t for _, _, t in server.requests[:2]]
+    assert first[1] - first[0] < 0.04
+
+
+def test_download_pdfs_reports_throughput(server, tmp_path):
+    server.script["/pdf"] = [(200, {})]
+    links = [url(server, f"/pdf?meeting={i}") for i in range(6)]
+    stats = scraper.download_pdfs(links, folder=str(tmp_path), workers=3, rate_limit=None,
+                                  incremental=False)
+    assert stats['dateien'] == 6 and stats['fehler'] == 0
+    assert stats['bytes'] == 6 * len(PDF_BODY)
+    assert stats['dateien_pro_s'] > 0 and stats['mb_pro_s'] >= 0
+    assert sorted(p.name for p in tmp_path.iterdir()) == [f"{i}.pdf" for i in range(6)]
+
+
+def download(server, tmp_path, retries=2, manifest=None):
+    with scraper.create_session() as session:
+        return scraper._download_one(session, url(server, "/pdf?meeting=1"), str(tmp_path),
+                                     None, retries, 0.01, manifest)
+
+
+def test_aborted_download_resumes_with_range(server, tmp_path, monkeypatch):
+    # Kleine Blöcke, damit vor dem Abbruch schon ein Teil in der .part-Datei steht
+    monkeypatch.setattr(scraper, "CHUNK_SIZE", 256)
+    server.script["/pdf"] = [(200, {"ETag": '"v1"'}, PDF_BODY[:1000]), (206, {})]
+    file_name, transferred, status = download(server, tmp_path)
+    assert (tmp_path / "1.pdf").read_bytes() == PDF_BODY
+    assert server.headers[1]['Range'] == f"bytes={len(PDF_BODY) - transferred}-"
+    assert 0 < transferred < len(PDF_BODY) and status == 'neu'
+    assert server.headers[1]['If-Range'] == '"v1"'
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["1.pdf"]
+
+
+def test_unsatisfiable_range_restarts(server, tmp_path):
+    (tmp_path / "1.pdf.part").write_bytes(PDF_BODY + b"alt")
+    server.script["/pdf"] = [(416, {}), (200, {})]
+    download(server, tmp_path)
+    assert (tmp_path / "1.pdf").read_bytes() == PDF_BODY
+    assert 'Range' in server.headers[0] and 'Range' not in server.headers[1]
+
+
+def test_wrong_content_range_is_not_appended(server, tmp_path):
+    (tmp_path / "1.pdf.part").write_bytes(PDF_BODY[:1000])
+    server.script["/pdf"] = [(206, {"Content-Range": f"bytes 0-99/{len(PDF_BODY)}"}, PDF_BODY[:100]),
+                             (200, {})]
+    download(server, tmp_path)
+    assert (tmp_path / "1.pdf").read_bytes() == PDF_BODY
+    assert 'Range' not in server.headers[1]
+
+
+def test_length_mismatch_discards_part(server, tmp_path):
+    (tmp_path / "1.pdf.part").write_bytes(PDF_BODY[:1000])
+    server.script["/pdf"] = [(206, {"Content-Range": f"bytes 1000-{len(PDF_BODY) - 1}/{len(PDF_BODY) - 10}"}),
+                             (200, {})]
+    download(server, tmp_path)
+    assert (tmp_path / "1.pdf").read_bytes() == PDF_BODY
+    assert len(server.requests) == 2 and 'Range' not in server.headers[1]
+
+
+def test_not_modified_keeps_file(server, tmp_path):
+    server.script["/pdf"] = [(200, {"ETag": '"v1"'}), (304, {})]
+    manifest = scraper.DownloadManifest(str(tmp_path))
+    assert download(server, tmp_path, manifest=manifest)[2] == 'neu'
+    assert download(server, tmp_path, manifest=manifest) == ("1.pdf", 0, 'unveraendert')
+    assert server.headers[1]['If-None-Match'] == '"v1"'
+    assert (tmp_path / "1.pdf").read_bytes() == PDF_BODY
+
+
+def test_download_has_single_retry_budget(server, tmp_path):
+    server.script["/pdf"] = [(503, {})]
+    with pytest.raises(requests.HTTPError):
+        download(server, tmp_path, retries=2)
+    assert len(server.requests) == 3
+
+
+def league_page(links):
+    return "".join(f'<a class="picto-pdf" href="{link}">PDF</a>' for link in links).encode()
+
+
+def test_fetch_pdf_links_retries_and_is_rate_limited(server):
+    server.script["/liga"] = [(503, {}), (200, {})]
+    server.bodies["/liga"] = league_page([url(server, "/pdf?meeting=1")])
+    limiter = scraper.HostRateLimiter(rate=20)
+    with scraper.create_session() as session:
+        links = scraper.fetch_pdf_links(url(server, "/liga"), session, limiter, retries=2, backoff=0.01)
+    assert links == [url(server, "/pdf?meeting=1")]
+    times = [t for _, _, t in server.requests]
+    assert len(times) == 2 and times[1] - times[0] >= 0.04
+
+
+def test_crawl_uses_full_concurrency(server, tmp_path):
+    # Mehr gleichzeitige Requests als der Standard-Pool von asyncio (höchstens 32 Threads)
+    n = 40
+    server.script["/pdf"] = [(200, {})]
+    server.script["/liga"] = [(200, {})]
+    server.bodies["/liga"] = league_page([url(server, f"/pdf?meeting={i}") for i in range(n)])
+    server.delay = 0.5
+    report = asyncio.run(scraper.crawl_leagues([url(server, "/liga?group=1")], folder=str(tmp_path),
+                                               concurrency=n, rate_limit=None, incremental=False))
+    summary = report[url(server, "/liga?group=1")]
+    assert summary['neu'] == n and summary['fehler'] == 0
+    assert server.peak > 32
+
+
+def _register(manifest, tmp_path, url, file_name, content):
+    part_path = tmp_path / (file_name + ".part")
+    part_path.write_bytes(content)
+    sha256 = hashlib.sha256(content).hexdigest()
+    status = manifest.register(url, file_name, requests.Response(), sha256, len(content), str(part_path))
+    if part_path.exists():
+        part_path.unlink()
+    return status
+
+
+def test_manifest_forgets_hash_of_replaced_content(tmp_path):
+    manifest = scraper.DownloadManifest(str(tmp_path))
+    assert _register(manifest, tmp_path, "u/1", "1.pdf", b"alt") == 'neu'
+    # Derselbe Bericht mit neuem Inhalt überschreibt 1.pdf
+    assert _register(manifest, tmp_path, "u/1", "1.pdf", b"neu") == 'neu'
+    assert (tmp_path / "1.pdf").read_bytes() == b"neu"
+    # Der alte Inhalt liegt nirgends mehr, ist also kein Duplikat von 1.pdf
+    assert _register(manifest, tmp_path, "u/2", "2.pdf", b"alt") == 'neu'
+    assert _register(manifest, tmp_path, "u/3", "3.pdf", b"neu") == 'duplikat'
+    assert manifest.entries["u/3"]['duplikat_von'] == "1.pdf"
+
+
+def test_manifest_concurrent_identical_downloads(tmp_path):
+    manifest = scraper.DownloadManifest(str(tmp_path))
+    barrier = threading.Barrier(8)
+    statuses = []
+
+    def worker(i):
+        barrier.wait()
+        statuses.append(_register(manifest, tmp_path, f"u/{i}", f"{i}.pdf", b"gleich"))
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(statuses) == ['duplikat'] * 7 + ['neu']
+    assert len(list(tmp_path.glob("*.pdf"))) == 1
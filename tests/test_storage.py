@@ -0,0 +1,84 @@
+import os
+
+import pytest
+
+import storage
+import synthetic
+from pdf_parser import build_dataframes
+
+N_GAMES = 9
+BATCH = 3
+
+
+def batches(n_games=N_GAMES, batch=BATCH):
+    """Synthetische Spiele in Batches, wie write_streaming sie an den Sink gibt"""
+    games = []
+    for league, game_info, players, events in synthetic.iter_games(n_games):
+        pdf_file = f"{league}/{game_info['spielnummer']}.pdf"
+        for row in [game_info] + players + events:
+            row['pdf_file'] = pdf_file
+        games.append((game_info, players, events))
+    for start in range(0, len(games), batch):
+        part = games[start:start + batch]
+        yield build_dataframes([g for g, _, _ in part], [p for _, ps, _ in part for p in ps],
+                               [e for _, _, es in part for e in es])
+
+
+def read_outputs(processed_dir):
+    outputs = {}
+    for table in storage.TABLES:
+        with open(storage.table_path(processed_dir, table, "csv"), "rb") as f:
+            outputs[table] = f.read()
+    return outputs
+
+
+def test_aborted_run_keeps_finished_batches_and_resumes(tmp_path):
+    reference = tmp_path / "ref"
+    with storage.TableSink(str(reference)) as sink:
+        for frames in batches():
+            sink.write_batch(*frames)
+    assert not os.path.exists(storage.journal_dir(str(reference)))
+
+    target = str(tmp_path / "lauf")
+    with pytest.raises(RuntimeError):
+        with storage.TableSink(target) as sink:
+            for i, frames in enumerate(batches()):
+                if i == 2:
+                    raise RuntimeError("Absturz")
+                sink.write_batch(*frames)
+    # Keine halben Ausgabedateien, aber zwei fertige Batches im Journal
+    assert os.listdir(target) == [storage.JOURNAL_DIR]
+    finished = storage.journal_pdf_files(target)
+    assert len(finished) == 2 * BATCH
+
+    with storage.TableSink(target, resume=True) as sink:
+        assert sink.resumed_batches == 2
+        for frames in batches():
+            if not set(frames[0]['pdf_file']) <= finished:
+                sink.write_batch(*frames)
+    assert read_outputs(target) == read_outputs(str(reference))
+    assert not os.path.exists(storage.journal_dir(target))
+
+
+def test_new_run_discards_old_journal(tmp_path):
+    target = str(tmp_path)
+    with pytest.raises(RuntimeError):
+        with storage.TableSink(target) as sink:
+            sink.write_batch(*next(batches()))
+            raise RuntimeError("Absturz")
+    with storage.TableSink(target) as sink:
+        assert sink.resumed_batches == 0
+    assert sink.rows['games'] == 0
+
+
+def test_repeated_game_in_later_batch_is_dropped(tmp_path):
+    first, second = list(batches(n_games=2, batch=1))
+    with storage.TableSink(str(tmp_path)) as sink:
+        sink.write_batch(*first)
+        # Dasselbe Spiel aus einem kopierten PDF
+        copy = [df.assign(pdf_file="kopie.pdf") for df in first]
+        written = sink.write_batch(*copy)
+        sink.write_batch(*second)
+    assert written.empty
+    assert sink.duplicates == len(first[1])
+    assert sink.rows['players'] == len(first[1]) + len(second[1])